@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-render cost of status email templates
+
+Compares the original f-string builder, which formatted all four status
+templates on every call, against the precompiled EmailTemplateRegistry.
+
+Usage:
+    python benchmarks/bench_email_templates.py [--renders 10000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.email_templates import EmailTemplateRegistry  # noqa: E402
+
+# A typical title/feedback pair, and one that needs HTML escaping
+INPUTS = {
+    "plain": ("Midnight Drive", "Great low end and a strong hook. Tighten the intro a little."),
+    "escaped": ("Midnight Drive <Extended Mix>", "Great low end & a strong hook. Tighten the intro a little.")
+}
+
+
+def legacy_get_email_template(status: str, submission_title: str, feedback: str) -> dict:
+    """Original MailgunService._get_email_template, kept for comparison"""
+    
+    templates = {
+        "approved": {
+            "subject": "🎉 Your Submission Has Been Approved!",
+            "html": f"""
+            <html>
+            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #10b981;">Great News!</h2>
+                <p>Your submission "<strong>{submission_title}</strong>" has been <strong>approved</strong>!</p>
+                <p>Congratulations! We're excited to work with you on this project.</p>
+                {f'<p><strong>Feedback:</strong> {feedback}</p>' if feedback else ''}
+                <p>Thank you for your submission and we look forward to hearing more from you!</p>
+                <hr style="margin: 20px 0;">
+                <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+            </body>
+            </html>
+            """,
+            "text": f"Great News! Your submission '{submission_title}' has been approved! Congratulations! We're excited to work with you on this project. {f'Feedback: {feedback}' if feedback else ''} Thank you for your submission and we look forward to hearing more from you! Best regards, The MeloTech Team"
+        },
+        "in-review": {
+            "subject": "Your Submission is Now In Review",
+            "html": f"""
+            <html>
+            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #3b82f6;">Submission In Review</h2>
+                <p>Your submission "<strong>{submission_title}</strong>" is now being reviewed by our team.</p>
+                <p>This is an exciting step! Our team will carefully evaluate your submission and provide detailed feedback.</p>
+                <p>We'll notify you as soon as the review is complete.</p>
+                <hr style="margin: 20px 0;">
+                <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+            </body>
+            </html>
+            """,
+            "text": f"Your submission '{submission_title}' is now being reviewed by our team. This is an exciting step! Our team will carefully evaluate your submission and provide detailed feedback. We'll notify you as soon as the review is complete. Best regards, The MeloTech Team"
+        },
+        "rejected": {
+            "subject": "Update on Your Submission",
+            "html": f"""
+            <html>
+            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #ef4444;">Submission Update</h2>
+                <p>Thank you for your submission "<strong>{submission_title}</strong>".</p>
+                <p>Unfortunately, we won't be able to move forward with this particular submission at this time.</p>
+                {f'<p><strong>Feedback:</strong> {feedback}</p>' if feedback else ''}
+                <p>We encourage you to keep creating and submitting new work. We're always looking for fresh talent!</p>
+                <hr style="margin: 20px 0;">
+                <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+            </body>
+            </html>
+            """,
+            "text": f"Thank you for your submission '{submission_title}'. Unfortunately, we won't be able to move forward with this particular submission at this time. {f'Feedback: {feedback}' if feedback else ''} We encourage you to keep creating and submitting new work. We're always looking for fresh talent! Best regards, The MeloTech Team"
+        },
+        "pending": {
+            "subject": "Your Submission is Under Review",
+            "html": f"""
+            <html>
+            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #f59e0b;">Submission Under Review</h2>
+                <p>Your submission "<strong>{submission_title}</strong>" is now under review.</p>
+                <p>We'll get back to you as soon as possible with our decision.</p>
+                <p>Thank you for your patience!</p>
+                <hr style="margin: 20px 0;">
+                <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+            </body>
+            </html>
+            """,
+            "text": f"Your submission '{submission_title}' is now under review. We'll get back to you as soon as possible with our decision. Thank you for your patience! Best regards, The MeloTech Team"
+        }
+    }
+    
+    return templates.get(status, templates["pending"])
+
+
+def time_per_render(func, renders: int) -> float:
+    """Best-of-fifteen microseconds per call"""
+    best = min(timeit.repeat(func, number=renders, repeat=15))
+    return best / renders * 1_000_000
+
+
+def peak_bytes_per_render(func) -> int:
+    """Peak bytes allocated while rendering once"""
+    func()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(renders: int):
+    print("✉️  Email template benchmark")
+    print(f"   {renders} renders per run, best of 15")
+    print("=" * 40)
+
+    registry = EmailTemplateRegistry()
+    # Override directory present but unchanged: adds a throttled mtime check
+    with tempfile.TemporaryDirectory() as template_dir:
+        with open(os.path.join(template_dir, "approved.subject.txt"), "w", encoding="utf-8") as f:
+            f.write("Approved: {title}")
+        overridden = EmailTemplateRegistry(template_dir)
+
+        for label, (title, feedback) in INPUTS.items():
+            renderers = {
+                "legacy f-strings": lambda: legacy_get_email_template("approved", title, feedback),
+                "registry": lambda: registry.render("approved", title, feedback),
+                "registry + overrides": lambda: overridden.render("approved", title, feedback)
+            }
+            results = {name: time_per_render(func, renders) for name, func in renderers.items()}
+
+            print(f"\n{label} input:")
+            baseline = results["legacy f-strings"]
+            for name, micros in results.items():
+                peak = peak_bytes_per_render(renderers[name])
+                print(
+                    f"  {name:<22} {micros:8.2f} µs/render  ({baseline / micros:.1f}x)"
+                    f"  peak {peak / 1024:5.1f} KiB"
+                )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--renders", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.renders)
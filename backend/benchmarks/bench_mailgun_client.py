@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark: event-loop latency while sending a burst of status emails
+
+Runs a local HTTP sink that stands in for the Mailgun API and fires a burst
+of status-change notifications at it, once through the old blocking
+``requests.post`` path and once through the async ``MailgunService``.
+A probe task measures how late the event loop wakes up while the burst is
+in flight; that lateness is what every WebSocket and request on the same
+worker would see.
+
+Usage:
+    python benchmarks/bench_mailgun_client.py [--emails 500] [--delay-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SINK_HOST = "127.0.0.1"
+SINK_PORT = 8765
+
+# Point the service at the local sink before config is imported
+os.environ["MAILGUN_API_URL"] = f"http://{SINK_HOST}:{SINK_PORT}/v3"
+os.environ.setdefault("MAILGUN_API_KEY", "bench-key")
+os.environ.setdefault("MAILGUN_DOMAIN", "bench.local")
+
+import requests  # noqa: E402
+from services.mailgun_service import MailgunService  # noqa: E402
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    """Accepts any POST, waits a fixed delay and answers like Mailgun"""
+
+    protocol_version = "HTTP/1.1"
+    delay = 0.02
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        time.sleep(self.delay)
+        body = b'{"id": "<bench@local>", "message": "Queued. Thank you."}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_sink(delay: float) -> ThreadingHTTPServer:
+    """Start the HTTP sink on a background thread"""
+    SinkHandler.delay = delay
+    server = ThreadingHTTPServer((SINK_HOST, SINK_PORT), SinkHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe_loop_lag(samples: list, stop: asyncio.Event, interval: float = 0.005):
+    """Record how late the loop wakes up from a short sleep"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def send_blocking(service: MailgunService, index: int) -> bool:
+    """Old behaviour: a blocking requests.post inside an async route"""
+    template = service.templates.render("approved", f"Track {index}", "Nice mix")
+    response = requests.post(
+        f"{service.base_url}/messages",
+        auth=("api", service.api_key),
+        data={
+            "from": service.from_email,
+            "to": f"artist{index}@example.com",
+            "subject": template["subject"],
+            "text": template["text"],
+            "html": template["html"]
+        }
+    )
+    return response.status_code == 200
+
+
+async def send_async(service: MailgunService, index: int) -> bool:
+    """New behaviour: pooled, bounded async client"""
+    return await service.send_status_update_email(
+        user_email=f"artist{index}@example.com",
+        submission_title=f"Track {index}",
+        status="approved",
+        feedback="Nice mix"
+    )
+
+
+async def run_burst(name: str, sender, emails: int) -> dict:
+    """Fire a burst of sends while probing event-loop latency"""
+    service = MailgunService()
+    samples = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(samples, stop))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(sender(service, i) for i in range(emails)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    await service.aclose()
+
+    return {
+        "name": name,
+        "sent": sum(1 for ok in results if ok),
+        "elapsed": elapsed,
+        "lag_p50": percentile(samples, 50) * 1000,
+        "lag_p99": percentile(samples, 99) * 1000,
+        "lag_max": max(samples) * 1000 if samples else 0.0,
+        "probes": len(samples)
+    }
+
+
+def print_result(result: dict, emails: int):
+    """Print one benchmark row"""
+    print(
+        f"{result['name']:<10} sent={result['sent']}/{emails} "
+        f"wall={result['elapsed']:.2f}s probes={result['probes']} "
+        f"loop-lag p50={result['lag_p50']:.1f}ms "
+        f"p99={result['lag_p99']:.1f}ms max={result['lag_max']:.1f}ms"
+    )
+
+
+async def main(emails: int, delay_ms: float):
+    print("📨 Mailgun client benchmark")
+    print(f"   burst={emails} emails, sink delay={delay_ms:.0f}ms")
+    print("=" * 40)
+    server = start_sink(delay_ms / 1000)
+    try:
+        for name, sender in (("blocking", send_blocking), ("async", send_async)):
+            print_result(await run_burst(name, sender, emails), emails)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--delay-ms", type=float, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.emails, args.delay_ms))
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PUT /submissions/{id} database round trips
+
+Runs a local HTTP server that stands in for PostgREST and GoTrue, adding a
+fixed delay to every request to model the network hop to Supabase. Each
+update is then timed through two pipelines:
+
+- four-trip: the original route, i.e. update, re-select the submission,
+  look up users.authid, then fetch the auth user for the email
+- one-trip: update_submission_with_email, which returns the projected row
+  and user_email from a single RPC
+
+Both pipelines queue the status email in a throwaway outbox, so only the
+database path differs.
+
+Usage:
+    python benchmarks/bench_submission_update.py [--updates 300] [--delay-ms 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STUB_HOST = "127.0.0.1"
+STUB_PORT = 8766
+
+# Point the services at the local stand-in before config is imported
+os.environ["SUPABASE_URL"] = f"http://{STUB_HOST}:{STUB_PORT}"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench-key")
+os.environ.setdefault("MAILGUN_API_KEY", "bench-key")
+os.environ.setdefault("MAILGUN_DOMAIN", "bench.local")
+
+from services.email_outbox import EmailOutbox  # noqa: E402
+from services.mailgun_service import MailgunService  # noqa: E402
+from services.supabase_service import AsyncSupabaseService  # noqa: E402
+
+SUBMISSION_ID = "3f1c9a52-7d7e-4c1a-9a51-0c6b1d0a8e11"
+USER_ID = "8a7b6c5d-1111-4222-8333-944455556666"
+AUTH_ID = "0d9e8f7a-aaaa-4bbb-8ccc-dddeeefff000"
+EMAIL = "artist@example.com"
+
+SUBMISSION = {
+    "id": SUBMISSION_ID,
+    "userid": USER_ID,
+    "title": "Midnight Drive",
+    "status": "approved",
+    "rating": 8,
+    "feedback": "Great low end",
+    "genre": "synthwave",
+    "bpm": 110,
+    "audio_url": "https://cdn.example.com/melotechaudio/1700000000000-midnight-drive.wav",
+    "artwork_url": "https://cdn.example.com/melotechaudio/1700000000000-cover.png",
+    "description": "A late-night drive through neon streets. " * 8,
+    "created_at": "2024-05-01T12:00:00.000000+00:00",
+    "updated_at": "2024-05-02T09:30:00.000000+00:00"
+}
+PROJECTED = {
+    key: SUBMISSION[key]
+    for key in ("id", "userid", "title", "status", "rating", "feedback", "updated_at")
+}
+AUTH_USER = {
+    "id": AUTH_ID,
+    "aud": "authenticated",
+    "role": "authenticated",
+    "email": EMAIL,
+    "app_metadata": {},
+    "user_metadata": {},
+    "created_at": "2024-01-01T00:00:00.000000+00:00"
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers the handful of PostgREST/GoTrue calls the update route makes"""
+
+    protocol_version = "HTTP/1.1"
+    delay = 0.005
+    # Send headers and body in one segment so delayed ACKs don't skew timings
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def _reply(self, body):
+        data = json.dumps(body).encode("utf-8")
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/rest/v1/submissions":
+            self._reply([SUBMISSION])
+        elif path == "/rest/v1/users":
+            self._reply([{"authid": AUTH_ID}])
+        elif path.startswith("/auth/v1/admin/users/"):
+            self._reply(AUTH_USER)
+        else:
+            self._reply([])
+
+    def do_PATCH(self):
+        self._read_body()
+        self._reply([SUBMISSION])
+
+    def do_POST(self):
+        self._read_body()
+        path = urlparse(self.path).path
+        if path == "/rest/v1/rpc/update_submission_with_email":
+            self._reply(dict(PROJECTED, user_email=EMAIL))
+        else:
+            self._reply([])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(delay: float) -> ThreadingHTTPServer:
+    """Start the stand-in server on a background thread"""
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer((STUB_HOST, STUB_PORT), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def update_four_trips(service: AsyncSupabaseService, outbox: EmailOutbox) -> bool:
+    """Original route: update, re-read, then two queries for the email"""
+    client = service.client
+    update_data = {"status": "approved", "feedback": "Great low end", "updated_at": "now()"}
+    result = await client.table("submissions").update(update_data).eq("id", SUBMISSION_ID).execute()
+    if not result.data:
+        return False
+    submission = (await client.table("submissions").select("*").eq("id", SUBMISSION_ID).execute()).data[0]
+    user = await client.table("users").select("authid").eq("id", submission["userid"]).execute()
+    auth_user = await client.auth.admin.get_user_by_id(user.data[0]["authid"])
+    outbox.enqueue(auth_user.user.email, submission["title"], "approved", "Great low end")
+    return True
+
+
+async def update_one_trip(service: AsyncSupabaseService, outbox: EmailOutbox) -> bool:
+    """New route: one RPC returns the projected row and user_email"""
+    result = await service.update_submission_with_email(
+        SUBMISSION_ID,
+        status="approved",
+        feedback="Great low end"
+    )
+    if not result:
+        return False
+    outbox.enqueue(result.pop("user_email"), result["title"], "approved", "Great low end")
+    return True
+
+
+async def run(name: str, pipeline, updates: int, outbox: EmailOutbox) -> dict:
+    """Time sequential updates through one pipeline"""
+    service = AsyncSupabaseService()
+    await service.connect()
+    # Warm up the connection pool and imports
+    for _ in range(5):
+        await pipeline(service, outbox)
+
+    samples = []
+    ok = 0
+    for _ in range(updates):
+        started = time.perf_counter()
+        ok += await pipeline(service, outbox)
+        samples.append(time.perf_counter() - started)
+    await service.aclose()
+
+    return {
+        "name": name,
+        "ok": ok,
+        "p50": percentile(samples, 50) * 1000,
+        "p99": percentile(samples, 99) * 1000,
+        "mean": sum(samples) / len(samples) * 1000
+    }
+
+
+def print_result(result: dict, updates: int):
+    """Print one benchmark row"""
+    print(
+        f"{result['name']:<10} ok={result['ok']}/{updates} "
+        f"p50={result['p50']:.1f}ms p99={result['p99']:.1f}ms mean={result['mean']:.1f}ms"
+    )
+
+
+async def main(updates: int, delay_ms: float):
+    print("🗄️  Submission update benchmark")
+    print(f"   updates={updates}, stand-in latency={delay_ms:.1f}ms per request")
+    print("=" * 40)
+    server = start_stub(delay_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = EmailOutbox(MailgunService(), os.path.join(tmp, "outbox.sqlite3"))
+        try:
+            for name, pipeline in (("four-trip", update_four_trips), ("one-trip", update_one_trip)):
+                print_result(await run(name, pipeline, updates, outbox), updates)
+        finally:
+            outbox._db.close()
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--updates", type=int, default=300)
+    parser.add_argument("--delay-ms", type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.updates, args.delay_ms))
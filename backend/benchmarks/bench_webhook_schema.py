@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dict webhook events vs typed, slotted event records
+
+Sends batches of realtime submission-update events through two versions of
+the webhook handler's hot path:
+
+- dict: the handler before typed payloads - json_codec.loads into dicts, then
+  .get() walks for the dedupe key and the realtime stage (copied below)
+- typed: the current WebhookHandler - one msgspec decode from bytes into
+  SubmissionEvent / SubmissionRecord structs, then attribute access
+
+Each version runs parse, deduplication (a fresh cache per batch, so every
+event is new) and process_realtime_submission_update, which drops the cached
+submission and merges into the WebSocket coalescing window, inside a
+running event loop as in the server. No sockets are connected, so nothing is
+sent.
+
+events/sec is the best of several timed loops, with the garbage collector on
+as in the server. bytes/event is the memory still held by one parsed batch
+(tracemalloc), i.e. what each queued event costs while it waits for a worker.
+
+Usage:
+    python benchmarks/bench_webhook_schema.py [--batch 100] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench-key")
+os.environ.setdefault("MAILGUN_API_KEY", "bench-key")
+os.environ.setdefault("MAILGUN_DOMAIN", "bench.local")
+os.environ.setdefault("OUTBOX_PATH", os.path.join(tempfile.mkdtemp(), "outbox.sqlite3"))
+
+from handlers.webhook_handler import WebhookHandler  # noqa: E402
+from services import json_codec  # noqa: E402
+from services.cache import TTLCache  # noqa: E402
+from services.websocket_service import websocket_manager  # noqa: E402
+
+STATUSES = ["pending", "in-review", "approved", "rejected"]
+
+
+def make_row(i: int, status: str) -> dict:
+    """A full submissions row, as Supabase sends it"""
+    return {
+        "id": f"3f1c9a52-7d7e-4c1a-9a51-{i:012d}",
+        "userid": f"8d2e41c0-55aa-4f0e-b1a7-{i % 50:012d}",
+        "title": f"Midnight Drive {i}",
+        "genre": "Melodic Techno",
+        "bpm": 122 + i % 8,
+        "key": "A minor",
+        "description": "Late night driving track with a rolling bassline and airy pads.",
+        "files": [f"submissions/{i}/master.wav", f"submissions/{i}/stems.zip"],
+        "status": status,
+        "rating": i % 10,
+        "feedback": "Great low end, the chorus could hit harder.",
+        "created_at": "2024-05-01T18:12:44.120391+00:00",
+        "updated_at": f"2024-05-02T09:30:{i % 60:02d}.000000+00:00"
+    }
+
+
+def make_body(batch: int) -> bytes:
+    """A realtime webhook body with a batch of submission updates"""
+    return json.dumps([
+        {
+            "type": "UPDATE",
+            "table": "submissions",
+            "schema": "public",
+            "record": make_row(i, STATUSES[(i + 1) % len(STATUSES)]),
+            "old_record": make_row(i, STATUSES[i % len(STATUSES)])
+        }
+        for i in range(batch)
+    ]).encode("utf-8")
+
+
+class DictPath:
+    """The hot path as it was before typed payloads"""
+
+    def __init__(self, handler: WebhookHandler):
+        self.handler = handler
+
+    def parse_events(self, body: bytes) -> list:
+        payload = json_codec.loads(body)
+        events = payload if isinstance(payload, list) else [payload]
+        if not all(isinstance(event, dict) for event in events):
+            raise ValueError("Each webhook event must be a JSON object")
+        return events
+
+    def event_key(self, payload: dict):
+        record = payload.get("record") or payload.get("old_record") or {}
+        if not record.get("id") or not record.get("updated_at"):
+            return None
+        return (payload.get("type"), record["id"], record["updated_at"])
+
+    def process(self, payload: dict) -> dict:
+        if payload.get("table") != "submissions":
+            return {"message": "Not a submission update, ignoring"}
+        new_record = payload.get("record") or {}
+        old_record = payload.get("old_record") or {}
+        if payload.get("type") == "DELETE":
+            self.handler.supabase_service.invalidate_submission(old_record.get("id"))
+            return {"message": "Submission deleted, cache entry dropped"}
+        if new_record.get("id"):
+            self.handler.supabase_service.invalidate_submission(new_record["id"])
+        status = new_record.get("status")
+        rating = new_record.get("rating")
+        feedback = new_record.get("feedback", "")
+        updated_fields = []
+        if old_record.get("status") != status:
+            updated_fields.append("status")
+        if old_record.get("rating") != rating:
+            updated_fields.append("rating")
+        if old_record.get("feedback") != feedback:
+            updated_fields.append("feedback")
+        response_data = {
+            "message": "Real-time submission update processed",
+            "submission_id": new_record.get("id"),
+            "title": new_record.get("title", "Unknown Title"),
+            "updated_fields": updated_fields,
+            "new_data": {"status": status, "rating": rating, "feedback": feedback},
+            "timestamp": new_record.get("updated_at")
+        }
+        websocket_manager.queue_submission_update(response_data, "admin")
+        if new_record.get("userid"):
+            websocket_manager.queue_submission_update_for_user(new_record["userid"], response_data)
+        return response_data
+
+
+class TypedPath:
+    """The current WebhookHandler hot path"""
+
+    def __init__(self, handler: WebhookHandler):
+        self.handler = handler
+
+    def parse_events(self, body: bytes) -> list:
+        return self.handler.parse_events(body)[0]
+
+    def event_key(self, event):
+        return self.handler.event_key(event)
+
+    def process(self, event) -> dict:
+        return self.handler.process_realtime_submission_update(event)
+
+
+def ingest(path, body: bytes) -> int:
+    """Parse, deduplicate and process one batch; returns events processed"""
+    events = path.parse_events(body)
+    seen = TTLCache(len(events) + 1, 600)
+    processed = 0
+    for event in events:
+        key = path.event_key(event)
+        if key is not None:
+            if seen.get(key) is not None:
+                continue
+            seen.set(key, True)
+        path.process(event)
+        processed += 1
+    return processed
+
+
+def best_rate(fn, body: bytes, events: int, repeat: int) -> float:
+    """Best events/sec over several timed loops"""
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn(body)
+        if time.perf_counter() - started > 0.2:
+            break
+        calls *= 2
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn(body)
+        best = max(best, calls * events / (time.perf_counter() - started))
+    return best
+
+
+def retained_bytes(parse, body: bytes, events: int) -> float:
+    """Memory held by one parsed batch, per event"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    parsed = parse(body)
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del parsed
+    return held / events
+
+
+async def main(batch: int, repeat: int):
+    print("🧾 Webhook schema benchmark")
+    print("=" * 40)
+    handler = WebhookHandler()
+    body = make_body(batch)
+    print(f"codec: {json_codec.BACKEND}, batch={batch} events, {len(body)} bytes ({len(body) // batch} B/event on the wire)")
+    for name, path in (("dict", DictPath(handler)), ("typed", TypedPath(handler))):
+        assert ingest(path, body) == batch
+        parse_rate = best_rate(path.parse_events, body, batch, repeat)
+        ingest_rate = best_rate(lambda data: ingest(path, data), body, batch, repeat)
+        held = retained_bytes(path.parse_events, body, batch)
+        print(
+            f"  {name:<6} parse={parse_rate:>9.0f} events/s  parse+dedupe+stage={ingest_rate:>8.0f} events/s  "
+            f"held={held:>6.0f} B/event"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch, args.repeat))
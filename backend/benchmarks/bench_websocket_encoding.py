@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes on the wire and server CPU per WebSocket encoding
+
+Connects N in-process fake sockets to a WebSocketManager and broadcasts a
+sequence of distinct submission_update events through the normal queues.
+The fake socket does what the server would do with each ASGI message: build
+the frame, running it through a per-connection permessage-deflate extension
+(the websockets implementation uvicorn uses, with the WS_DEFLATE_* settings)
+when the mode has it. Modes:
+
+- json: JSON text frames (the default)
+- json+pmd: JSON text with permessage-deflate
+- msgpack: binary msgpack frames (melotech.msgpack subprotocol)
+- msgpack+pmd: msgpack with permessage-deflate
+- deflate: JSON pre-compressed once per event (?compression=deflate)
+
+permessage-deflate compresses separately for every connection, so its CPU
+grows with the number of recipients; with context takeover each connection
+also keeps its own compressor, which is where repeated keys like new_data and
+updated_fields stop costing bytes after the first event.
+
+CPU time is measured with time.process_time() and divided by N x events.
+
+Usage:
+    python benchmarks/bench_websocket_encoding.py [--clients 1000 10000] [--events 20]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate  # noqa: E402
+from websockets.frames import Frame, Opcode  # noqa: E402
+
+from config import config  # noqa: E402
+from services.websocket_service import WebSocketManager  # noqa: E402
+
+MODES = {
+    # mode: (manager encoding, permessage-deflate)
+    "json": ("text", False),
+    "json+pmd": ("text", True),
+    "msgpack": ("msgpack", False),
+    "msgpack+pmd": ("msgpack", True),
+    "deflate": ("deflate", False)
+}
+
+STATUSES = ["pending", "in-review", "approved", "rejected"]
+FEEDBACK = [
+    "Great low end, the chorus could hit harder. Send stems when ready.",
+    "Vocals sit too far back in the mix; the arrangement works.",
+    "Not a fit for the label right now, but keep us posted.",
+    ""
+]
+
+
+def make_events(count: int) -> list:
+    """Distinct submission_update payloads like the realtime webhook sends"""
+    return [
+        {
+            "message": "Real-time submission update processed",
+            "submission_id": f"3f1c9a52-7d7e-4c1a-9a51-{i:012d}",
+            "title": f"Midnight Drive {i}",
+            "updated_fields": ["status", "rating", "feedback"][: 1 + i % 3],
+            "new_data": {
+                "status": STATUSES[i % len(STATUSES)],
+                "rating": i % 10,
+                "feedback": FEEDBACK[i % len(FEEDBACK)]
+            },
+            "timestamp": f"2024-05-02T09:30:{i % 60:02d}.000000+00:00"
+        }
+        for i in range(count)
+    ]
+
+
+def deflate_extension() -> PerMessageDeflate:
+    """The server side of a negotiated permessage-deflate session"""
+    no_takeover = config.WS_DEFLATE_NO_CONTEXT_TAKEOVER
+    return PerMessageDeflate(
+        remote_no_context_takeover=no_takeover,
+        local_no_context_takeover=no_takeover,
+        remote_max_window_bits=config.WS_DEFLATE_WINDOW_BITS,
+        local_max_window_bits=config.WS_DEFLATE_WINDOW_BITS,
+        compress_settings={"level": config.WS_DEFLATE_LEVEL, "memLevel": config.WS_DEFLATE_MEM_LEVEL}
+    )
+
+
+class FakeSocket:
+    """Stands in for a Starlette WebSocket and the server's frame encoder"""
+
+    def __init__(self, counter: list, compress: bool):
+        self.counter = counter
+        self.extension = deflate_extension() if compress else None
+        self.bytes_out = 0
+        self.scope = {"subprotocols": []}
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send(self, message: dict):
+        text = message.get("text")
+        if text is not None:
+            frame = Frame(Opcode.TEXT, text.encode("utf-8"))
+        else:
+            frame = Frame(Opcode.BINARY, message["bytes"])
+        if self.extension is not None:
+            frame = self.extension.encode(frame)
+        size = len(frame.data)
+        # 2-byte header for payloads under 126 bytes, 4 bytes up to 64 KiB
+        self.bytes_out += size + (2 if size < 126 else 4)
+        self.counter[0] += 1
+
+
+async def measure(mode: str, clients: int, events: list) -> dict:
+    """CPU time and wire bytes per delivered event for one mode"""
+    encoding, compress = MODES[mode]
+    manager = WebSocketManager()
+    manager.send_queue_size = len(events) + 1
+    await manager.start()
+    counter = [0]
+    sockets = [FakeSocket(counter, compress) for _ in range(clients)]
+    for socket in sockets:
+        await manager.connect(socket, "admin", encoding=encoding)
+    await asyncio.sleep(0)
+
+    gc.collect()
+    expected = clients * len(events)
+    started = time.process_time()
+    for event in events:
+        await manager.broadcast_submission_update(event, "admin")
+    while counter[0] < expected:
+        await asyncio.sleep(0)
+    cpu = time.process_time() - started
+
+    wire = sum(socket.bytes_out for socket in sockets)
+    for socket in sockets:
+        manager.disconnect(socket)
+    await manager.stop()
+    await asyncio.sleep(0)
+    return {
+        "mode": mode,
+        "cpu_us": cpu / expected * 1e6,
+        "wire_b": wire / expected
+    }
+
+
+async def main(client_counts: list, event_count: int):
+    print("📦 WebSocket encoding benchmark")
+    print("=" * 40)
+    print(
+        f"permessage-deflate: level={config.WS_DEFLATE_LEVEL} memLevel={config.WS_DEFLATE_MEM_LEVEL} "
+        f"window_bits={config.WS_DEFLATE_WINDOW_BITS} no_context_takeover={config.WS_DEFLATE_NO_CONTEXT_TAKEOVER}"
+    )
+    events = make_events(event_count)
+    for clients in client_counts:
+        print(f"clients={clients} events={event_count}")
+        for mode in MODES:
+            result = await measure(mode, clients, events)
+            print(f"  {result['mode']:<12} cpu={result['cpu_us']:.2f}us/message wire={result['wire_b']:.0f}B/message")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.events))
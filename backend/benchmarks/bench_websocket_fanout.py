@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fanning one submission event out to many WebSocket clients
+
+Connects N in-process fake sockets to a WebSocketManager and broadcasts one
+submission_update event to all of them. The fake socket does what the ASGI
+server would do with the message: UTF-8 encode a text payload, or take a
+bytes payload as-is. Four paths are compared:
+
+- send_text: awaiting websocket.send_text(json) per socket, which builds a
+  new ASGI message for every recipient
+- shared: awaiting websocket.send() with one shared PreparedMessage
+- queued: broadcast_submission_update through the per-connection queues
+- queued-deflate: the same, for clients that asked for pre-compressed payloads
+
+The first two rows call the sockets directly, isolating the cost of encoding
+per socket; the last two include the per-connection queues and writer tasks
+that every broadcast goes through.
+
+CPU time is measured with time.process_time(), allocations with
+tracemalloc (peak bytes during the fan-out), both divided by N.
+
+Usage:
+    python benchmarks/bench_websocket_fanout.py [--clients 1000 10000 50000]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("WS_SEND_QUEUE_SIZE", "256")
+
+from services.websocket_service import PreparedMessage, WebSocketManager  # noqa: E402
+
+EVENT = {
+    "message": "Real-time submission update processed",
+    "submission_id": "3f1c9a52-7d7e-4c1a-9a51-0c6b1d0a8e11",
+    "title": "Midnight Drive",
+    "updated_fields": ["status", "rating", "feedback"],
+    "new_data": {
+        "status": "approved",
+        "rating": 8,
+        "feedback": "Great low end, the chorus could hit harder. Send stems when ready."
+    },
+    "timestamp": "2024-05-02T09:30:00.000000+00:00"
+}
+
+
+class FakeSocket:
+    """Stands in for a Starlette WebSocket and the server's frame encoder"""
+
+    def __init__(self, counter: list):
+        self.counter = counter
+        self.bytes_out = 0
+        self.scope = {"subprotocols": []}
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send(self, message: dict):
+        text = message.get("text")
+        payload = text.encode("utf-8") if text is not None else message["bytes"]
+        # 2-byte header for payloads under 126 bytes, 4 bytes up to 64 KiB
+        self.bytes_out += len(payload) + (2 if len(payload) < 126 else 4)
+        self.counter[0] += 1
+
+    async def send_text(self, data: str):
+        await self.send({"type": "websocket.send", "text": data})
+
+
+async def setup(clients: int, encoding: str):
+    """Connect the fake sockets to a fresh manager"""
+    manager = WebSocketManager()
+    manager.send_queue_size = 16
+    await manager.start()
+    counter = [0]
+    sockets = [FakeSocket(counter) for _ in range(clients)]
+    for socket in sockets:
+        await manager.connect(socket, "admin", encoding=encoding)
+    return manager, sockets, counter
+
+
+async def fan_out(path: str, manager: WebSocketManager, sockets: list, counter: list):
+    """Broadcast one event and wait until every socket has sent it"""
+    if path == "send_text":
+        message = json.dumps({"type": "submission_update", "data": EVENT, "timestamp": 0.0})
+        for socket in sockets:
+            await socket.send_text(message)
+    elif path == "shared":
+        message = PreparedMessage.from_event({"type": "submission_update", "data": EVENT, "timestamp": 0.0})
+        for socket in sockets:
+            await socket.send(message.asgi_message("text"))
+    else:
+        await manager.broadcast_submission_update(EVENT, "admin")
+        while counter[0] < len(sockets):
+            await asyncio.sleep(0)
+
+
+async def measure(path: str, clients: int) -> dict:
+    """CPU time and peak allocation per recipient for one path"""
+    encoding = "deflate" if path == "queued-deflate" else "text"
+
+    # CPU pass
+    manager, sockets, counter = await setup(clients, encoding)
+    await asyncio.sleep(0)
+    gc.collect()
+    started = time.process_time()
+    await fan_out(path, manager, sockets, counter)
+    cpu = time.process_time() - started
+    wire = sum(socket.bytes_out for socket in sockets)
+    for socket in sockets:
+        manager.disconnect(socket)
+
+    # Allocation pass
+    manager, sockets, counter = await setup(clients, encoding)
+    await asyncio.sleep(0)
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    await fan_out(path, manager, sockets, counter)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    for socket in sockets:
+        manager.disconnect(socket)
+    await asyncio.sleep(0)
+
+    return {
+        "path": path,
+        "cpu_us": cpu / clients * 1e6,
+        "alloc_b": peak / clients,
+        "wire_b": wire / clients
+    }
+
+
+async def main(client_counts: list):
+    print("📡 WebSocket fan-out benchmark")
+    print("=" * 40)
+    for clients in client_counts:
+        print(f"clients={clients}")
+        for path in ("send_text", "shared", "queued", "queued-deflate"):
+            result = await measure(path, clients)
+            print(
+                f"  {result['path']:<14} cpu={result['cpu_us']:.2f}us/recipient "
+                f"peak-alloc={result['alloc_b']:.0f}B/recipient "
+                f"wire={result['wire_b']:.0f}B/recipient"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    asyncio.run(main(args.clients))
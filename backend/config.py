@@ -16,14 +16,86 @@ class Config:
     # Supabase Configuration
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+    SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+    
+    # User Lookup Cache Configuration
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+    
+    # Submission Cache Configuration (kept fresh by the realtime webhook)
+    SUBMISSION_CACHE_MAX_SIZE = int(os.getenv("SUBMISSION_CACHE_MAX_SIZE", "5000"))
+    SUBMISSION_CACHE_TTL = float(os.getenv("SUBMISSION_CACHE_TTL", "300"))
+    
+    # Bulk Review Configuration
+    BULK_REVIEW_MAX_ITEMS = int(os.getenv("BULK_REVIEW_MAX_ITEMS", "200"))
+    
+    # Submission Listing Configuration
+    SUBMISSION_PAGE_DEFAULT = int(os.getenv("SUBMISSION_PAGE_DEFAULT", "20"))
+    SUBMISSION_PAGE_MAX = int(os.getenv("SUBMISSION_PAGE_MAX", "100"))
     
     # Mailgun Configuration
     MAILGUN_API_KEY = os.getenv("MAILGUN_API_KEY")
     MAILGUN_DOMAIN = os.getenv("MAILGUN_DOMAIN")
     MAILGUN_FROM_EMAIL = os.getenv("MAILGUN_FROM_EMAIL", "noreply@yourdomain.com")
+    MAILGUN_API_URL = os.getenv("MAILGUN_API_URL", "https://api.mailgun.net/v3")
+    MAILGUN_TIMEOUT = float(os.getenv("MAILGUN_TIMEOUT", "10"))
+    MAILGUN_MAX_CONNECTIONS = int(os.getenv("MAILGUN_MAX_CONNECTIONS", "20"))
+    MAILGUN_MAX_CONCURRENCY = int(os.getenv("MAILGUN_MAX_CONCURRENCY", "10"))
+    MAILGUN_BATCH_WINDOW = float(os.getenv("MAILGUN_BATCH_WINDOW", "0.5"))
+    MAILGUN_BATCH_MAX = int(os.getenv("MAILGUN_BATCH_MAX", "1000"))
+    
+    # Email Template Configuration
+    EMAIL_TEMPLATE_DIR = os.getenv("EMAIL_TEMPLATE_DIR")
+    EMAIL_TEMPLATE_RELOAD_INTERVAL = float(os.getenv("EMAIL_TEMPLATE_RELOAD_INTERVAL", "2"))
+    
+    # Email Outbox Configuration
+    OUTBOX_PATH = os.getenv("OUTBOX_PATH", "email_outbox.sqlite3")
+    OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))
+    OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "600"))
+    OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    OUTBOX_CLAIM_BATCH = int(os.getenv("OUTBOX_CLAIM_BATCH", "100"))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+    
+    # WebSocket Configuration
+    WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce")  # drop_oldest, coalesce or disconnect
+    WS_PRECOMPRESS_LEVEL = int(os.getenv("WS_PRECOMPRESS_LEVEL", "6"))
+    WS_COALESCE_WINDOW = float(os.getenv("WS_COALESCE_WINDOW", "0.05"))  # seconds; 0 sends every update at once
+    WS_REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "1000"))  # recent events kept for ?since= replay
+    WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "30"))  # seconds between pings to quiet clients; 0 disables
+    WS_HEARTBEAT_TIMEOUT = float(os.getenv("WS_HEARTBEAT_TIMEOUT", "75"))  # seconds without a pong before a connection is reaped
+    # permessage-deflate, applied when uvicorn runs with --ws services.websocket_protocol:TunedDeflateWebSocketsProtocol
+    WS_DEFLATE_LEVEL = int(os.getenv("WS_DEFLATE_LEVEL", "6"))
+    WS_DEFLATE_MEM_LEVEL = int(os.getenv("WS_DEFLATE_MEM_LEVEL", "5"))
+    WS_DEFLATE_WINDOW_BITS = int(os.getenv("WS_DEFLATE_WINDOW_BITS", "12"))
+    WS_DEFLATE_NO_CONTEXT_TAKEOVER = os.getenv("WS_DEFLATE_NO_CONTEXT_TAKEOVER", "false").lower() == "true"
+    
+    # Cross-Worker Pub/Sub Configuration (unset PUBSUB_URL = single process, in-memory)
+    PUBSUB_URL = os.getenv("PUBSUB_URL")
+    PUBSUB_CHANNEL = os.getenv("PUBSUB_CHANNEL", "melotech:websocket")
     
     # Webhook Configuration
     WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+    WEBHOOK_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+    # Timestamped signatures (X-Signature-Timestamp) are rejected outside this window
+    # and accepted only once within it
+    WEBHOOK_SIGNATURE_TOLERANCE = int(os.getenv("WEBHOOK_SIGNATURE_TOLERANCE", "300"))
+    WEBHOOK_REQUIRE_TIMESTAMP = os.getenv("WEBHOOK_REQUIRE_TIMESTAMP", "false").lower() == "true"
+    WEBHOOK_NONCE_CACHE_SIZE = int(os.getenv("WEBHOOK_NONCE_CACHE_SIZE", "10000"))
+    WEBHOOK_MAX_BATCH = int(os.getenv("WEBHOOK_MAX_BATCH", "500"))  # events per request
+    WEBHOOK_DEDUPE_MAX_SIZE = int(os.getenv("WEBHOOK_DEDUPE_MAX_SIZE", "10000"))
+    WEBHOOK_DEDUPE_TTL = float(os.getenv("WEBHOOK_DEDUPE_TTL", "600"))  # seconds an event id is remembered
+    WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))  # accepted events waiting for a consumer
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+    # Status events are kept in a SQLite inbox (in OUTBOX_PATH) until processed
+    WEBHOOK_INBOX_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_INBOX_MAX_ATTEMPTS", "8"))
+    WEBHOOK_INBOX_LEASE_SECONDS = float(os.getenv("WEBHOOK_INBOX_LEASE_SECONDS", "60"))  # before another process may take over an event
+    
+    # JSON Codec Configuration (auto = orjson, then msgspec, then stdlib json)
+    JSON_CODEC = os.getenv("JSON_CODEC", "auto")
     
     # Application Configuration
     APP_NAME = "MeloTech Backend"
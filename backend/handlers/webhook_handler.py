@@ -4,13 +4,20 @@ Webhook handler for processing Supabase database webhooks
 
 import hmac
 import hashlib
-import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Tuple, Union
+import msgspec
 from fastapi import HTTPException
 from config import config
-from services.mailgun_service import MailgunService
-from services.supabase_service import SupabaseService
+from models import SubmissionEvent, SubmissionRecord, submission_events_decoder
+from services import json_codec
+from services.cache import TTLCache
+from services.mailgun_service import MailgunService, MailgunBatcher
+from services.email_outbox import EmailOutbox
+from services.supabase_service import AsyncSupabaseService
 from services.websocket_service import websocket_manager
+from services.webhook_pipeline import WebhookPipeline
+from services.webhook_inbox import WebhookInbox
 
 
 class WebhookHandler:
@@ -18,69 +25,256 @@ class WebhookHandler:
     
     def __init__(self):
         self.mailgun_service = MailgunService()
-        self.supabase_service = SupabaseService()
+        self.supabase_service = AsyncSupabaseService()
+        self.mailgun_batcher = MailgunBatcher(self.mailgun_service)
+        self.email_outbox = EmailOutbox(self.mailgun_batcher)
+        # Cache invalidations reach every worker over the WebSocket pub/sub channel
+        self.supabase_service.publish_invalidation = websocket_manager.publish_invalidation
+        websocket_manager.invalidation_handler = self.supabase_service.apply_invalidation
+        # Events already handled, per endpoint, so Supabase retries are not processed twice
+        self.seen_status_events = TTLCache(config.WEBHOOK_DEDUPE_MAX_SIZE, config.WEBHOOK_DEDUPE_TTL)
+        self.seen_realtime_events = TTLCache(config.WEBHOOK_DEDUPE_MAX_SIZE, config.WEBHOOK_DEDUPE_TTL)
+        # Timestamped signatures already accepted, so a captured request can't be replayed
+        # while its timestamp is still within tolerance
+        self.seen_signatures = TTLCache(config.WEBHOOK_NONCE_CACHE_SIZE, 2 * config.WEBHOOK_SIGNATURE_TOLERANCE)
+        # Requests are acknowledged once their events are queued; consumers do the rest,
+        # sharded by submission id so one submission's events are handled in order
+        self.pipeline = WebhookPipeline(self.process_queued_event, key=self.queued_event_key)
+        # Status events are stored before the 202 and deleted once processed, so a
+        # crash, restart or failed send doesn't lose the email
+        self.webhook_inbox = WebhookInbox()
+        # Inbox ids queued in this process, so the sweeper doesn't queue them twice
+        self._inbox_in_flight: set = set()
     
-    def verify_webhook_signature(self, payload: str, signature: str, secret: str) -> bool:
-        """Verify webhook signature for security"""
+    def verify_webhook_signature(
+        self,
+        payload: Union[bytes, bytearray, str],
+        signature: str,
+        secret: str,
+        timestamp: Optional[str] = None
+    ) -> bool:
+        """Verify webhook signature for security (HMAC-SHA256 of "<timestamp>." + body when timestamped)"""
         try:
-            expected_signature = hmac.new(
-                secret.encode('utf-8'),
-                payload.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            if isinstance(payload, str):
+                payload = payload.encode('utf-8')
+            mac = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+            if timestamp is not None:
+                mac.update(timestamp.encode('ascii') + b".")
+            # Hash the raw body buffer directly, without decoding or concatenating it
+            mac.update(payload)
             
-            return hmac.compare_digest(signature, expected_signature)
+            return hmac.compare_digest(signature, mac.hexdigest())
         except Exception as e:
             print(f"Error verifying webhook signature: {str(e)}")
             return False
     
-    def process_submission_status_update(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def verify_request(self, body: bytes, signature: Optional[str], timestamp: Optional[str] = None):
+        """Check a webhook's signature, and for timestamped signatures its age and that it is not a replay"""
+        if not config.WEBHOOK_SECRET:
+            return
+        if not signature:
+            raise HTTPException(status_code=401, detail="Missing webhook signature")
+        if timestamp is None and config.WEBHOOK_REQUIRE_TIMESTAMP:
+            raise HTTPException(status_code=401, detail="Missing webhook signature timestamp")
+        if timestamp is not None:
+            try:
+                age = abs(time.time() - int(timestamp))
+            except (ValueError, OverflowError):
+                raise HTTPException(status_code=401, detail="Invalid webhook signature timestamp")
+            if age > config.WEBHOOK_SIGNATURE_TOLERANCE:
+                raise HTTPException(status_code=401, detail="Webhook signature timestamp outside tolerance")
+        if not self.verify_webhook_signature(body, signature, config.WEBHOOK_SECRET, timestamp):
+            raise HTTPException(status_code=401, detail="Invalid webhook signature")
+        if timestamp is not None:
+            if self.seen_signatures.get(signature) is not None:
+                raise HTTPException(status_code=401, detail="Webhook signature already used")
+            self.seen_signatures.set(signature, True)
+    
+    def parse_events(self, body: bytes) -> Tuple[List[SubmissionEvent], bool]:
+        """Parse and validate a webhook body holding one event or a JSON array of events"""
+        try:
+            parsed = submission_events_decoder.decode(body)
+        except msgspec.ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid webhook event: {str(e)}")
+        except msgspec.DecodeError:
+            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        is_batch = isinstance(parsed, list)
+        events = parsed if is_batch else [parsed]
+        if len(events) > config.WEBHOOK_MAX_BATCH:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many events. Maximum is {config.WEBHOOK_MAX_BATCH}"
+            )
+        return events, is_batch
+    
+    def event_key(self, event: SubmissionEvent) -> Optional[Tuple]:
+        """Identity of an event for deduplication: its type, record id, updated_at and reviewed columns"""
+        row = event.row
+        if row is None or not row.id or not row.updated_at:
+            return None
+        # The reviewed columns are part of the key so that a real change is never
+        # dropped when a writer leaves updated_at as it was
+        return (event.type, row.id, row.updated_at, row.status, row.rating, row.feedback)
+    
+    def claim_events(
+        self,
+        events: List[SubmissionEvent],
+        seen: TTLCache
+    ) -> Tuple[List[Tuple[Optional[Tuple], SubmissionEvent]], int]:
+        """Mark new events as seen and drop ones already seen or repeated in the batch"""
+        fresh = []
+        duplicates = 0
+        for event in events:
+            key = self.event_key(event)
+            if key is not None:
+                if seen.get(key) is not None:
+                    duplicates += 1
+                    continue
+                seen.set(key, True)
+            fresh.append((key, event))
+        return fresh, duplicates
+    
+    def ingest_events(self, body: bytes, kind: str) -> Dict[str, Any]:
+        """Deduplicate a webhook's events and queue the distinct ones for the consumers"""
+        seen = self.seen_status_events if kind == "status" else self.seen_realtime_events
+        events, _ = self.parse_events(body)
+        fresh, duplicates = self.claim_events(events, seen)
+        
+        inbox_ids: List[Optional[int]] = [None] * len(fresh)
+        if fresh and kind == "status":
+            try:
+                inbox_ids = self.webhook_inbox.add_many(
+                    "status", [msgspec.json.encode(event) for _, event in fresh]
+                )
+            except Exception:
+                self.forget_events(fresh, seen)
+                raise
+        
+        items = [(kind, key, event, inbox_id) for (key, event), inbox_id in zip(fresh, inbox_ids)]
+        stored = [inbox_id for inbox_id in inbox_ids if inbox_id is not None]
+        if fresh and not self.pipeline.submit(items):
+            # Not accepted: drop the stored copies and let the retry through deduplication
+            self.webhook_inbox.delete_many(stored)
+            self.forget_events(fresh, seen)
+            if not self.pipeline.running:
+                raise HTTPException(status_code=503, detail="Webhook pipeline is not running")
+            raise HTTPException(
+                status_code=429,
+                detail="Webhook queue is full, retry later",
+                headers={"Retry-After": "1"}
+            )
+        
+        self._inbox_in_flight.update(stored)
+        
+        return {
+            "message": "Webhook accepted",
+            "accepted": len(fresh),
+            "duplicates": duplicates
+        }
+    
+    def forget_events(self, fresh: List[Tuple[Optional[Tuple], SubmissionEvent]], seen: TTLCache):
+        """Drop events from deduplication, e.g. when they could not be accepted"""
+        for key, _ in fresh:
+            if key is not None:
+                seen.delete(key)
+    
+    def queued_event_key(self, item: Tuple[str, Optional[Tuple], SubmissionEvent, Optional[int]]) -> Optional[str]:
+        """Submission id of a queued event, used to keep its events in order"""
+        row = item[2].row
+        return row.id if row is not None else None
+    
+    async def process_queued_event(self, item: Tuple[str, Optional[Tuple], SubmissionEvent, Optional[int]]):
+        """Run the email or broadcast stage for one queued event"""
+        kind, key, event, inbox_id = item
+        try:
+            if kind == "status":
+                await self.process_status_event(event)
+            else:
+                await self.process_realtime_event(event)
+        except Exception as e:
+            if inbox_id is not None:
+                # The stored copy is queued again after a backoff
+                self.webhook_inbox.mark_failed(inbox_id, str(e))
+            raise
+        else:
+            if inbox_id is not None:
+                self.webhook_inbox.delete_many([inbox_id])
+        finally:
+            self._inbox_in_flight.discard(inbox_id)
+    
+    async def redeliver_stored_events(self, rows: List[Tuple[int, str, bytes, int]]) -> int:
+        """Queue stored events again: retries, and events left behind by a stopped or crashed process"""
+        items = []
+        for inbox_id, kind, payload, _ in rows:
+            if inbox_id in self._inbox_in_flight:
+                # Still waiting in this process's queue; the claim only renewed its lease
+                continue
+            try:
+                event = submission_events_decoder.decode(payload)
+            except (msgspec.ValidationError, msgspec.DecodeError) as e:
+                self.webhook_inbox.mark_failed(inbox_id, f"Undecodable stored event: {str(e)}")
+                continue
+            key = self.event_key(event)
+            if key is not None:
+                self.seen_status_events.set(key, True)
+            items.append((kind, key, event, inbox_id))
+        
+        if not items:
+            return 0
+        if not self.pipeline.submit(items):
+            self.webhook_inbox.release([item[3] for item in items])
+            return 0
+        self._inbox_in_flight.update(item[3] for item in items)
+        return len(items)
+    
+    async def process_status_event(self, event: SubmissionEvent) -> Dict[str, Any]:
+        """Process one event sent to the status update webhook"""
+        if event.table == "submissions":
+            return await self.process_submission_status_update(event)
+        return {"message": f"Unsupported table: {event.table}"}
+    
+    async def process_submission_status_update(self, event: SubmissionEvent) -> Dict[str, Any]:
         """Process submission status update webhook"""
         
         # Check if this is a submission update
-        if payload.get("table") != "submissions":
+        if event.table != "submissions":
             return {"message": "Not a submission update, ignoring"}
         
         # Check if status field was updated
-        old_record = payload.get("old_record", {})
-        new_record = payload.get("record", {})
+        old_record = event.old_record or SubmissionRecord()
+        new_record = event.record or SubmissionRecord()
         
-        old_status = old_record.get("status")
-        new_status = new_record.get("status")
+        old_status = old_record.status
+        new_status = new_record.status
         
         # Only send email if status actually changed
         if old_status != new_status and new_status in ["accepted", "rejected", "pending"]:
-            userid = new_record.get("userid")
-            submission_title = new_record.get("title", "Your Submission")
-            feedback = new_record.get("feedback", "")
+            userid = new_record.userid
+            submission_title = new_record.title or "Your Submission"
+            feedback = new_record.feedback or ""
             
             if userid:
                 # Get user email
-                user_email = self.supabase_service.get_user_email_by_authid(userid)
+                # A failed lookup raises, so the event is retried rather than dropped
+                user_email = await self.supabase_service.get_user_email_by_userid(userid, raise_errors=True)
                 
                 if user_email:
-                    # Send email notification
-                    success = self.mailgun_service.send_status_update_email(
+                    # Queue email notification for the outbox workers
+                    outbox_id = self.email_outbox.enqueue(
                         user_email=user_email,
                         submission_title=submission_title,
                         status=new_status,
-                        feedback=feedback
+                        feedback=feedback,
+                        submission_id=new_record.id
                     )
                     
-                    if success:
-                        return {
-                            "message": "Email notification sent successfully",
-                            "user_email": user_email,
-                            "submission_title": submission_title,
-                            "status": new_status
-                        }
-                    else:
-                        return {
-                            "message": "Failed to send email notification",
-                            "user_email": user_email,
-                            "submission_title": submission_title,
-                            "status": new_status
-                        }
+                    return {
+                        "message": "Email notification queued",
+                        "outbox_id": outbox_id,
+                        "user_email": user_email,
+                        "submission_title": submission_title,
+                        "status": new_status
+                    }
                 else:
                     return {
                         "message": "User email not found",
@@ -97,79 +291,138 @@ class WebhookHandler:
                 "new_status": new_status
             }
     
-    def handle_webhook_request(self, body: str, signature: Optional[str] = None) -> Dict[str, Any]:
-        """Handle incoming webhook request"""
+    def handle_webhook_request(
+        self,
+        body: bytes,
+        signature: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Verify and queue a status webhook (one event or an array of events)"""
         
         try:
             # Verify webhook signature if provided
-            if signature and config.WEBHOOK_SECRET:
-                if not self.verify_webhook_signature(body, signature, config.WEBHOOK_SECRET):
-                    raise HTTPException(status_code=401, detail="Invalid webhook signature")
-            
-            # Parse the webhook payload
-            payload = json.loads(body)
+            self.verify_request(body, signature, timestamp)
             
-            # Process the webhook based on table
-            if payload.get("table") == "submissions":
-                return self.process_submission_status_update(payload)
-            else:
-                return {"message": f"Unsupported table: {payload.get('table')}"}
+            # Parse, deduplicate and queue the events
+            return self.ingest_events(body, "status")
                 
-        except json.JSONDecodeError:
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error processing webhook: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
-    def handle_realtime_webhook_request(self, body: str, signature: Optional[str] = None) -> Dict[str, Any]:
-        """Handle real-time submission updates for admin dashboard"""
+    def process_user_update(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Invalidate cached email lookups when a users row changes"""
+        
+        # DELETE events carry only old_record
+        new_record = payload.get("record") or {}
+        old_record = payload.get("old_record") or {}
+        
+        userid = new_record.get("id") or old_record.get("id")
+        authids = {new_record.get("authid"), old_record.get("authid")} - {None}
+        
+        self.supabase_service.invalidate_user(userid, authids)
+        
+        return {
+            "message": "User cache invalidated",
+            "userid": userid,
+            "authids": sorted(authids)
+        }
+    
+    def handle_user_webhook_request(
+        self,
+        body: bytes,
+        signature: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Handle users table webhook for cache invalidation"""
         
         try:
             # Verify webhook signature if provided
-            if signature and config.WEBHOOK_SECRET:
-                if not self.verify_webhook_signature(body, signature, config.WEBHOOK_SECRET):
-                    raise HTTPException(status_code=401, detail="Invalid webhook signature")
+            self.verify_request(body, signature, timestamp)
             
             # Parse the webhook payload
-            payload = json.loads(body)
+            payload = json_codec.loads(body)
+            if not isinstance(payload, dict):
+                raise HTTPException(status_code=400, detail="Webhook event must be a JSON object")
             
-            # Process real-time updates for submissions table
-            if payload.get("table") == "submissions":
-                return self.process_realtime_submission_update(payload)
+            if payload.get("table") == "users":
+                return self.process_user_update(payload)
             else:
-                return {"message": f"Unsupported table for real-time updates: {payload.get('table')}"}
+                return {"message": f"Unsupported table for user updates: {payload.get('table')}"}
                 
-        except json.JSONDecodeError:
+        except HTTPException:
+            raise
+        except json_codec.DECODE_ERRORS:
             raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        except Exception as e:
+            print(f"Error processing user webhook: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    def handle_realtime_webhook_request(
+        self,
+        body: bytes,
+        signature: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Verify and queue real-time submission updates (one event or an array of events)"""
+        
+        try:
+            # Verify webhook signature if provided
+            self.verify_request(body, signature, timestamp)
+            
+            # Parse, deduplicate and queue the events
+            return self.ingest_events(body, "realtime")
+                
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error processing real-time webhook: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
-    def process_realtime_submission_update(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_realtime_event(self, event: SubmissionEvent) -> Dict[str, Any]:
+        """Process one event sent to the real-time webhook"""
+        if event.table == "submissions":
+            return self.process_realtime_submission_update(event)
+        return {"message": f"Unsupported table for real-time updates: {event.table}"}
+    
+    def process_realtime_submission_update(self, event: SubmissionEvent) -> Dict[str, Any]:
         """Process real-time submission update webhook"""
         
         # Check if this is a submission update
-        if payload.get("table") != "submissions":
+        if event.table != "submissions":
             return {"message": "Not a submission update, ignoring"}
         
         # Get the updated record
-        new_record = payload.get("record", {})
-        old_record = payload.get("old_record", {})
+        new_record = event.record or SubmissionRecord()
+        old_record = event.old_record or SubmissionRecord()
+        
+        # Drop the cached row; the event only carries the declared columns, so the
+        # next read refills the cache with the full row
+        if event.type == "DELETE":
+            self.supabase_service.invalidate_submission(old_record.id)
+            return {
+                "message": "Submission deleted, cache entry dropped",
+                "submission_id": old_record.id
+            }
+        if new_record.id:
+            self.supabase_service.invalidate_submission(new_record.id)
         
         # Extract relevant information
-        submission_id = new_record.get("id")
-        title = new_record.get("title", "Unknown Title")
-        status = new_record.get("status")
-        rating = new_record.get("rating")
-        feedback = new_record.get("feedback", "")
+        submission_id = new_record.id
+        title = new_record.title or "Unknown Title"
+        status = new_record.status
+        rating = new_record.rating
+        feedback = new_record.feedback
         
         # Check what fields were updated
         updated_fields = []
-        if old_record.get("status") != status:
+        if old_record.status != status:
             updated_fields.append("status")
-        if old_record.get("rating") != rating:
+        if old_record.rating != rating:
             updated_fields.append("rating")
-        if old_record.get("feedback") != feedback:
+        if old_record.feedback != feedback:
             updated_fields.append("feedback")
         
         # Prepare response data
@@ -183,7 +436,7 @@ class WebhookHandler:
                 "rating": rating,
                 "feedback": feedback
             },
-            "timestamp": new_record.get("updated_at")
+            "timestamp": new_record.updated_at
         }
         
         # Broadcast update to admin WebSocket connections
@@ -191,8 +444,11 @@ class WebhookHandler:
             import asyncio
             loop = asyncio.get_event_loop()
             if loop.is_running():
-                # If we're in an async context, schedule the broadcast
-                asyncio.create_task(websocket_manager.broadcast_submission_update(response_data, "admin"))
+                # If we're in an async context, merge into the current coalescing window
+                websocket_manager.queue_submission_update(response_data, "admin")
+                # The owning artist gets the change on their own connections only
+                if new_record.userid:
+                    websocket_manager.queue_submission_update_for_user(new_record.userid, response_data)
             else:
                 # If we're not in an async context, run in a new event loop
                 asyncio.run(websocket_manager.broadcast_submission_update(response_data, "admin"))
@@ -2,15 +2,49 @@
 MeloTech Backend - Main Application Entry Point
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from config import config
 from routes import router
+from routes.api_routes import webhook_handler
+from services.json_codec import CodecJSONResponse
+from services.websocket_service import websocket_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown hooks"""
+    # One Supabase client and HTTP/2 pool per process, shared by all handlers
+    await webhook_handler.supabase_service.connect()
+    await webhook_handler.email_outbox.start()
+    # Subscribe to cross-worker WebSocket events
+    await websocket_manager.start()
+    # Consumers for accepted webhook events
+    await webhook_handler.pipeline.start()
+    # Requeue stored status events: retries, and any left by the last run
+    await webhook_handler.webhook_inbox.start(
+        webhook_handler.redeliver_stored_events,
+        webhook_handler.pipeline.free_slots
+    )
+    yield
+    await webhook_handler.webhook_inbox.stop()
+    # Drain accepted webhooks while the services they use are still up
+    await webhook_handler.pipeline.stop()
+    await websocket_manager.stop()
+    await webhook_handler.email_outbox.stop()
+    # Release pooled outbound connections
+    await webhook_handler.mailgun_service.aclose()
+    await webhook_handler.supabase_service.aclose()
+
 
 # Create FastAPI application
 app = FastAPI(
     title=config.APP_NAME,
     version=config.APP_VERSION,
-    description="Backend service with Mailgun integration for submission status notifications"
+    description="Backend service with Mailgun integration for submission status notifications",
+    lifespan=lifespan,
+    # Route return values are rendered with the shared JSON codec (orjson when installed)
+    default_response_class=CodecJSONResponse
 )
 
 # Include API routes
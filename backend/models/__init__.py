@@ -3,5 +3,14 @@ Models package for MeloTech Backend
 """
 
 from .item import Item
+from .submission import SubmissionReview, BulkReviewRequest
+from .webhook import SubmissionRecord, SubmissionEvent, submission_events_decoder
 
-__all__ = ["Item"]
+__all__ = [
+    "Item",
+    "SubmissionReview",
+    "BulkReviewRequest",
+    "SubmissionRecord",
+    "SubmissionEvent",
+    "submission_events_decoder"
+]
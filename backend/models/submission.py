@@ -0,0 +1,19 @@
+"""
+Pydantic models for submission review endpoints
+"""
+
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class SubmissionReview(BaseModel):
+    """One submission update in a bulk review"""
+    id: str
+    status: Optional[str] = None
+    rating: Optional[int] = None
+    feedback: Optional[str] = None
+
+
+class BulkReviewRequest(BaseModel):
+    """Body of POST /submissions/bulk-review"""
+    updates: List[SubmissionReview]
@@ -0,0 +1,41 @@
+"""
+Typed Supabase webhook payloads, decoded straight from the request bytes
+"""
+
+from typing import List, Optional, Union
+import msgspec
+
+
+class SubmissionRecord(msgspec.Struct, gc=False):
+    """A submissions row as sent in a webhook's record / old_record"""
+    # Only the columns the pipeline reads; the rest of the row is skipped
+    id: Optional[str] = None
+    userid: Optional[str] = None
+    title: Optional[str] = None
+    status: Optional[str] = None
+    # Whatever numeric type the column has (or a numeric sent as a string)
+    rating: Union[int, float, str, None] = None
+    feedback: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class SubmissionEvent(msgspec.Struct, gc=False):
+    """One Supabase database webhook event for the submissions table"""
+    type: Optional[str] = None
+    table: Optional[str] = None
+    schema: Optional[str] = None
+    record: Optional[SubmissionRecord] = None
+    # DELETE events carry only old_record
+    old_record: Optional[SubmissionRecord] = None
+
+    @property
+    def row(self) -> Optional[SubmissionRecord]:
+        """The record, or old_record when there is none"""
+        return self.record or self.old_record
+
+
+# A webhook body is one event or a JSON array of events. The decoder is built
+# once at import and parses and type-checks the bytes in a single pass; keys
+# that are not declared above are skipped rather than materialised. The structs
+# are slotted and untracked by the garbage collector (they hold no cycles)
+submission_events_decoder = msgspec.json.Decoder(Union[List[SubmissionEvent], SubmissionEvent])
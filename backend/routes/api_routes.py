@@ -2,11 +2,15 @@
 API routes for MeloTech Backend
 """
 
-from typing import Union, Optional
-from fastapi import APIRouter, HTTPException, Request, Header, WebSocket, WebSocketDisconnect
+import base64
+import uuid
+from typing import Union, Optional, List, Tuple
+from fastapi import APIRouter, HTTPException, Request, Header, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from config import config
 from handlers.webhook_handler import WebhookHandler
-from models import Item
+from models import Item, BulkReviewRequest
+from services import json_codec
 from services.websocket_service import websocket_manager
 
 
@@ -16,6 +20,77 @@ router = APIRouter()
 # Initialize webhook handler
 webhook_handler = WebhookHandler()
 
+# Statuses a submission can be moved to
+SUBMISSION_STATUSES = ["pending", "in-review", "approved", "rejected"]
+
+# Columns the listing endpoint may return; id and updated_at are always
+# included because the pagination cursor is built from them
+SUBMISSION_LIST_FIELDS = [
+    "id", "userid", "title", "genre", "bpm", "key", "description",
+    "files", "status", "rating", "feedback", "created_at", "updated_at"
+]
+SUBMISSION_LIST_DEFAULT_FIELDS = ["id", "title", "genre", "status", "rating", "created_at", "updated_at"]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque pagination cursor for the (updated_at, id) of the last row on a page"""
+    raw = json_codec.dumps_bytes([row["updated_at"], str(row["id"])])
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor from encode_cursor, rejecting anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, submission_id = json_codec.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for value in (updated_at, submission_id):
+        # Values are quoted into a PostgREST filter, so keep them plain strings
+        if not isinstance(value, str) or '"' in value or "\\" in value:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return updated_at, submission_id
+
+
+async def read_webhook_body(request: Request, limit: Optional[int] = None) -> bytes:
+    """Read a request body as bytes, rejecting it with 413 as soon as it passes the limit"""
+    limit = limit or config.WEBHOOK_MAX_BODY_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(status_code=413, detail=f"Webhook body too large. Maximum is {limit} bytes")
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Webhook body too large. Maximum is {limit} bytes")
+        if chunk:
+            chunks.append(chunk)
+    # A body that arrived in one chunk is used as-is, without copying
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+async def stream_submission_page(rows: list, next_cursor: Optional[str]):
+    """Stream a page as JSON one row at a time instead of building it in memory"""
+    yield b'{"submissions":['
+    for index, row in enumerate(rows):
+        # Chunks are bytes so the codec's output goes out without a str round trip
+        yield (b"," if index else b"") + json_codec.dumps_bytes(row, default=str)
+    yield b'],"next_cursor":' + json_codec.dumps_bytes(next_cursor) + b"}"
+
 
 @router.get("/")
 def read_root():
@@ -39,44 +114,66 @@ def update_item(item_id: int, item: Item):
     return {"item_name": item.name, "item_id": item_id}
 
 
-@router.post("/webhook/submission-status-update")
+@router.post("/webhook/submission-status-update", status_code=202)
 async def handle_submission_status_update(
     request: Request,
-    x_signature: Optional[str] = Header(None)
+    x_signature: Optional[str] = Header(None),
+    x_signature_timestamp: Optional[str] = Header(None)
 ):
     """Handle Supabase webhook for submission status updates"""
     
-    # Get raw body for signature verification
-    body = await request.body()
-    body_str = body.decode('utf-8')
+    # Get raw body for signature verification, as bytes and within the size limit
+    body = await read_webhook_body(request)
     
-    # Process webhook
-    return webhook_handler.handle_webhook_request(body_str, x_signature)
+    # Verify and queue the events; emails are sent by the pipeline consumers
+    return webhook_handler.handle_webhook_request(body, x_signature, x_signature_timestamp)
 
 
-@router.post("/webhook/submission-update")
+@router.post("/webhook/submission-update", status_code=202)
 async def handle_submission_update(
     request: Request,
-    x_signature: Optional[str] = Header(None)
+    x_signature: Optional[str] = Header(None),
+    x_signature_timestamp: Optional[str] = Header(None)
 ):
     """Handle real-time submission updates for admin dashboard"""
     
-    # Get raw body for signature verification
-    body = await request.body()
-    body_str = body.decode('utf-8')
+    # Get raw body for signature verification, as bytes and within the size limit
+    body = await read_webhook_body(request)
     
-    # Process webhook for real-time updates
-    return webhook_handler.handle_realtime_webhook_request(body_str, x_signature)
+    # Verify and queue the events; broadcasts are sent by the pipeline consumers
+    return webhook_handler.handle_realtime_webhook_request(body, x_signature, x_signature_timestamp)
+
+
+@router.post("/webhook/user-update")
+async def handle_user_update(
+    request: Request,
+    x_signature: Optional[str] = Header(None),
+    x_signature_timestamp: Optional[str] = Header(None)
+):
+    """Handle Supabase webhook for users table changes (cache invalidation)"""
+    
+    # Get raw body for signature verification, as bytes and within the size limit
+    body = await read_webhook_body(request)
+    
+    # Process webhook for cache invalidation
+    return webhook_handler.handle_user_webhook_request(body, x_signature, x_signature_timestamp)
 
 
 @router.websocket("/ws/admin")
-async def websocket_admin_endpoint(websocket: WebSocket):
+async def websocket_admin_endpoint(
+    websocket: WebSocket,
+    compression: Optional[str] = None,
+    since: Optional[int] = None,
+    stream: Optional[str] = None
+):
     """WebSocket endpoint for admin dashboard real-time updates"""
-    await websocket_manager.connect(websocket, "admin")
+    await websocket_manager.connect(websocket, "admin", encoding=compression, since=since, stream=stream)
     try:
         while True:
             # Keep connection alive and handle any incoming messages
             data = await websocket.receive_text()
+            if websocket_manager.record_activity(websocket, data):
+                continue
             # Echo back for connection testing
             await websocket_manager.send_personal_message(f"Echo: {data}", websocket)
     except WebSocketDisconnect:
@@ -84,13 +181,27 @@ async def websocket_admin_endpoint(websocket: WebSocket):
 
 
 @router.websocket("/ws/artist/{user_id}")
-async def websocket_artist_endpoint(websocket: WebSocket, user_id: str):
-    """WebSocket endpoint for artist real-time updates"""
-    await websocket_manager.connect(websocket, "artist", user_id)
+async def websocket_artist_endpoint(
+    websocket: WebSocket,
+    user_id: str,
+    token: Optional[str] = None,
+    compression: Optional[str] = None,
+    since: Optional[int] = None,
+    stream: Optional[str] = None
+):
+    """WebSocket endpoint for artist real-time updates (user_id is users.id, token a Supabase access token)"""
+    # Artists receive their own ratings and feedback, so the token must belong to user_id
+    if not token or not await webhook_handler.supabase_service.verify_user_token(user_id, token):
+        # Closing before accept rejects the handshake (HTTP 403)
+        await websocket.close(code=1008)
+        return
+    await websocket_manager.connect(websocket, "artist", user_id, encoding=compression, since=since, stream=stream)
     try:
         while True:
             # Keep connection alive and handle any incoming messages
             data = await websocket.receive_text()
+            if websocket_manager.record_activity(websocket, data):
+                continue
             # Echo back for connection testing
             await websocket_manager.send_personal_message(f"Echo: {data}", websocket)
     except WebSocketDisconnect:
@@ -108,7 +219,7 @@ async def update_submission(
     
     try:
         # Validate status if provided
-        if status and status not in ["pending", "in-review", "approved", "rejected"]:
+        if status and status not in SUBMISSION_STATUSES:
             raise HTTPException(
                 status_code=400, 
                 detail="Invalid status. Must be one of: pending, in-review, approved, rejected"
@@ -121,7 +232,7 @@ async def update_submission(
                 detail="Rating must be between 1 and 10"
             )
         
-        # Update submission in Supabase
+        # Fields being changed (updated_at is always set by the database)
         update_data = {}
         if status is not None:
             update_data["status"] = status
@@ -130,64 +241,227 @@ async def update_submission(
         if feedback is not None:
             update_data["feedback"] = feedback
         
-        # Add timestamp
-        update_data["updated_at"] = "now()"
-        
-        # Update in Supabase
-        result = webhook_handler.supabase_service.update_submission(submission_id, update_data)
+        # Update in Supabase; the owner's email comes back in the same round trip
+        result = await webhook_handler.supabase_service.update_submission_with_email(
+            submission_id,
+            status=status,
+            rating=rating,
+            feedback=feedback
+        )
         
         if result:
-            # Get the updated submission to send email notification
-            submission = webhook_handler.supabase_service.get_submission_by_id(submission_id)
+            user_email = result.pop("user_email", None)
             
-            if submission and status in ["pending", "in-review", "approved", "rejected"]:
-                # Send email notification
-                user_email = webhook_handler.supabase_service.get_user_email_by_userid(submission.get("userid"))
+            if status in SUBMISSION_STATUSES and user_email:
+                # Queue email notification; the outbox workers send it
+                webhook_handler.email_outbox.enqueue(
+                    user_email=user_email,
+                    submission_title=result.get("title") or "Your Submission",
+                    status=status,
+                    feedback=feedback or "",
+                    submission_id=str(result.get("id") or submission_id)
+                )
                 
-                if user_email:
-                    email_sent = webhook_handler.mailgun_service.send_status_update_email(
-                        user_email=user_email,
-                        submission_title=submission.get("title", "Your Submission"),
-                        status=status,
-                        feedback=feedback or ""
-                    )
-                    
-                    return {
-                        "message": "Submission updated successfully",
-                        "submission_id": submission_id,
-                        "updated_fields": list(update_data.keys()),
-                        "email_sent": email_sent,
-                        "data": result
-                    }
+                return {
+                    "message": "Submission updated successfully",
+                    "submission_id": submission_id,
+                    "updated_fields": list(update_data.keys()) + ["updated_at"],
+                    "email_queued": True,
+                    "data": result
+                }
             
             return {
                 "message": "Submission updated successfully",
                 "submission_id": submission_id,
-                "updated_fields": list(update_data.keys()),
+                "updated_fields": list(update_data.keys()) + ["updated_at"],
                 "data": result
             }
         else:
             raise HTTPException(status_code=404, detail="Submission not found")
             
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error updating submission: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/submissions/bulk-review")
+async def bulk_review_submissions(review: BulkReviewRequest):
+    """Apply many status, rating and feedback updates at once, reporting per item"""
+    
+    if len(review.updates) > config.BULK_REVIEW_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many updates. Maximum is {config.BULK_REVIEW_MAX_ITEMS}"
+        )
+    
+    try:
+        # Validate each item on its own so one bad row doesn't fail the batch
+        results = []
+        pending = {}
+        for item in review.updates:
+            result = {"id": item.id, "success": False}
+            results.append(result)
+            
+            try:
+                # The database casts ids to uuid; one malformed id would fail the whole call
+                submission_id = str(uuid.UUID(item.id))
+            except ValueError:
+                result["error"] = "Invalid submission id"
+                continue
+            
+            if submission_id in pending:
+                result["error"] = "Duplicate submission id in request"
+            elif item.status is None and item.rating is None and item.feedback is None:
+                result["error"] = "No fields to update"
+            elif item.status and item.status not in SUBMISSION_STATUSES:
+                result["error"] = "Invalid status. Must be one of: pending, in-review, approved, rejected"
+            elif item.rating is not None and (item.rating < 1 or item.rating > 10):
+                result["error"] = "Rating must be between 1 and 10"
+            else:
+                pending[submission_id] = (item, result)
+        
+        # Update every valid item in one round trip
+        rows = []
+        if pending:
+            rows = await webhook_handler.supabase_service.bulk_update_submissions_with_email(
+                [{**item.model_dump(), "id": submission_id} for submission_id, (item, _) in pending.items()]
+            )
+        if rows is None:
+            for _, result in pending.values():
+                result["error"] = "Database update failed"
+            rows = []
+        
+        updated_rows = {str(row["id"]): row for row in rows}
+        emails = []
+        email_results = []
+        updated = 0
+        for submission_id, (item, result) in pending.items():
+            row = updated_rows.get(submission_id)
+            if row is None:
+                result.setdefault("error", "Submission not found")
+                continue
+            
+            user_email = row.pop("user_email", None)
+            updated_fields = [
+                field for field in ("status", "rating", "feedback")
+                if getattr(item, field) is not None
+            ]
+            result.update({"success": True, "updated_fields": updated_fields, "data": row})
+            updated += 1
+            
+            if item.status in SUBMISSION_STATUSES and user_email:
+                emails.append({
+                    "user_email": user_email,
+                    "submission_title": row.get("title") or "Your Submission",
+                    "status": item.status,
+                    "feedback": item.feedback or "",
+                    "submission_id": submission_id
+                })
+                email_results.append(result)
+        
+        # Queue all notifications in one outbox transaction
+        if emails:
+            webhook_handler.email_outbox.enqueue_many(emails)
+            for result in email_results:
+                result["email_queued"] = True
+        
+        # No broadcast here: as for PUT, the realtime webhook announces the changed
+        # rows, coalesced into one frame per window (sending one here doubled them)
+        return {
+            "message": "Bulk review processed",
+            "updated": updated,
+            "failed": len(results) - updated,
+            "emails_queued": len(emails),
+            "results": results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error processing bulk review: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.get("/submissions/{submission_id}")
-async def get_submission(submission_id: str):
-    """Get submission by ID"""
+async def get_submission(
+    submission_id: str,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get submission by ID, answering 304 when the client's ETag is current"""
     try:
-        submission = webhook_handler.supabase_service.get_submission_by_id(submission_id)
+        submission, etag = await webhook_handler.supabase_service.get_submission_with_etag(submission_id)
         if submission:
-            return {"submission": submission}
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+            return json_codec.CodecJSONResponse({"submission": submission}, headers=headers)
         else:
             raise HTTPException(status_code=404, detail="Submission not found")
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting submission: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.get("/users/{userid}/submissions")
+async def list_user_submissions(
+    userid: str,
+    limit: int = Query(config.SUBMISSION_PAGE_DEFAULT, ge=1, le=config.SUBMISSION_PAGE_MAX),
+    cursor: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    fields: Optional[str] = None
+):
+    """List a user's submissions newest first, one keyset page at a time"""
+    
+    # Validate status filters if provided
+    if status and any(value not in SUBMISSION_STATUSES for value in status):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid status. Must be one of: pending, in-review, approved, rejected"
+        )
+    
+    # Project only the requested columns
+    columns = SUBMISSION_LIST_DEFAULT_FIELDS
+    if fields:
+        columns = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in columns if field not in SUBMISSION_LIST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        columns = list(dict.fromkeys(["id", "updated_at"] + columns))
+    
+    after = decode_cursor(cursor) if cursor else None
+    
+    # Fetch one extra row to know whether another page exists
+    rows = await webhook_handler.supabase_service.get_user_submissions_page(
+        userid,
+        columns,
+        limit + 1,
+        statuses=status,
+        after=after
+    )
+    if rows is None:
+        raise HTTPException(status_code=500, detail="Internal server error: could not list submissions")
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    
+    return StreamingResponse(
+        stream_submission_page(rows, next_cursor),
+        media_type="application/json"
+    )
+
+
+@router.get("/websockets/queues")
+def websocket_queue_stats():
+    """Per-connection WebSocket send queue depth and drop counters"""
+    return websocket_manager.get_queue_stats(include_connections=True)
+
+
 @router.get("/health")
 def health_check():
     """Health check endpoint"""
@@ -197,5 +471,22 @@ def health_check():
         "version": config.APP_VERSION,
         "features": ["mailgun", "supabase_webhooks", "websockets", "rest_api"],
         "active_connections": websocket_manager.get_connection_count(),
-        "active_rooms": websocket_manager.get_rooms()
+        "active_rooms": websocket_manager.get_rooms(),
+        "connected_users": websocket_manager.get_user_count(),
+        "websocket_pubsub": websocket_manager.get_pubsub_stats(),
+        "websocket_coalescing": websocket_manager.get_coalescing_stats(),
+        "websocket_replay": websocket_manager.get_replay_stats(),
+        "websocket_heartbeat": websocket_manager.get_heartbeat_stats(),
+        "websocket_queues": websocket_manager.get_queue_stats(),
+        "email_outbox": webhook_handler.email_outbox.get_stats(),
+        "email_batching": webhook_handler.mailgun_batcher.get_stats(),
+        "user_cache": webhook_handler.supabase_service.get_cache_stats(),
+        "submission_cache": webhook_handler.supabase_service.submission_cache.get_stats(),
+        "webhook_pipeline": webhook_handler.pipeline.get_stats(),
+        "webhook_inbox": webhook_handler.webhook_inbox.get_stats(),
+        "webhook_dedupe": {
+            "status_update": webhook_handler.seen_status_events.get_stats(),
+            "realtime": webhook_handler.seen_realtime_events.get_stats()
+        },
+        "json_codec": json_codec.BACKEND
     }
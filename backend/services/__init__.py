@@ -2,7 +2,8 @@
 Services package for MeloTech Backend
 """
 
-from .mailgun_service import MailgunService
-from .supabase_service import SupabaseService
+from .mailgun_service import MailgunService, MailgunBatcher
+from .supabase_service import AsyncSupabaseService
+from .email_outbox import EmailOutbox
 
-__all__ = ["MailgunService", "SupabaseService"]
+__all__ = ["MailgunService", "MailgunBatcher", "AsyncSupabaseService", "EmailOutbox"]
@@ -0,0 +1,277 @@
+"""
+Durable outbound email queue backed by SQLite
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Union
+from config import config
+from services.mailgun_service import MailgunService, MailgunBatcher
+
+
+# Seconds of sends the drain rate is averaged over
+DRAIN_RATE_WINDOW = 60.0
+
+# Only the oldest live email of a submission may be claimed. Its later emails
+# wait while it is leased or backing off, so an artist never gets "pending"
+# before the "approved" that preceded it, whatever the workers, batching or
+# retries do
+OLDEST_FOR_SUBMISSION = (
+    "(o.submission_id IS NULL OR NOT EXISTS ("
+    "SELECT 1 FROM email_outbox AS older WHERE older.submission_id = o.submission_id "
+    "AND older.state = 'pending' AND older.id < o.id))"
+)
+
+
+class EmailOutbox:
+    """Persistent email outbox drained by a pool of async workers"""
+
+    def __init__(
+        self,
+        mailgun_service: Union[MailgunService, MailgunBatcher],
+        path: Optional[str] = None
+    ):
+        self.mailgun_service = mailgun_service
+        self.path = path or config.OUTBOX_PATH
+        self.worker_count = config.OUTBOX_WORKERS
+        self.max_attempts = config.OUTBOX_MAX_ATTEMPTS
+        self.backoff_base = config.OUTBOX_BACKOFF_BASE
+        self.backoff_max = config.OUTBOX_BACKOFF_MAX
+        self.lease_seconds = config.OUTBOX_LEASE_SECONDS
+        self.claim_batch = config.OUTBOX_CLAIM_BATCH
+        self.poll_interval = config.OUTBOX_POLL_INTERVAL
+
+        self._db = self._connect()
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._running = False
+
+        # Delivery counters for /health
+        self.sent_total = 0
+        self.retried_total = 0
+        self.dead_lettered_total = 0
+        # Send times within the last DRAIN_RATE_WINDOW seconds, for the drain rate
+        self._sent_times: deque = deque()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the outbox database and make sure the table exists"""
+        db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        # WAL + NORMAL keeps an insert to a single buffered append
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                submission_id TEXT
+            )
+        """)
+        # Outboxes created before submission_id was added
+        columns = [row[1] for row in db.execute("PRAGMA table_info(email_outbox)")]
+        if "submission_id" not in columns:
+            db.execute("ALTER TABLE email_outbox ADD COLUMN submission_id TEXT")
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_email_outbox_ready "
+            "ON email_outbox (state, available_at)"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_email_outbox_submission "
+            "ON email_outbox (submission_id, state, id)"
+        )
+        return db
+
+    def enqueue(
+        self,
+        user_email: str,
+        submission_title: str,
+        status: str,
+        feedback: str = "",
+        submission_id: Optional[str] = None
+    ) -> int:
+        """Persist a status email for delivery and wake a worker"""
+        return self.enqueue_many([{
+            "user_email": user_email,
+            "submission_title": submission_title,
+            "status": status,
+            "feedback": feedback,
+            "submission_id": submission_id
+        }])[0]
+
+    def enqueue_many(self, messages: List[Dict[str, Optional[str]]]) -> List[int]:
+        """Persist several status emails in one transaction and wake the workers"""
+        now = time.time()
+        ids = []
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for message in messages:
+                payload = json.dumps({
+                    "user_email": message["user_email"],
+                    "submission_title": message["submission_title"],
+                    "status": message["status"],
+                    "feedback": message.get("feedback") or ""
+                })
+                cursor = self._db.execute(
+                    "INSERT INTO email_outbox (payload, available_at, created_at, submission_id) "
+                    "VALUES (?, ?, ?, ?)",
+                    (payload, now, now, message.get("submission_id"))
+                )
+                ids.append(cursor.lastrowid)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        if ids:
+            self._wakeup.set()
+        return ids
+
+    def _claim(self) -> List[Tuple[int, str, int]]:
+        """Lease a batch of due messages to this process"""
+        # Rows stay in the table until Mailgun accepts them; if this process
+        # dies mid-send the lease expires and another worker redelivers.
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute(
+                "SELECT id, payload, attempts FROM email_outbox AS o "
+                "WHERE state = 'pending' AND available_at <= ? AND " + OLDEST_FOR_SUBMISSION + " "
+                "ORDER BY available_at LIMIT ?",
+                (now, self.claim_batch)
+            ).fetchall()
+            if rows:
+                self._db.executemany(
+                    "UPDATE email_outbox SET available_at = ? WHERE id = ?",
+                    [(now + self.lease_seconds, row[0]) for row in rows]
+                )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return rows
+
+    def _seconds_until_due(self) -> float:
+        """Time until the next pending message becomes due, capped at the poll interval"""
+        row = self._db.execute(
+            "SELECT MIN(available_at) FROM email_outbox AS o WHERE state = 'pending' AND " + OLDEST_FOR_SUBMISSION
+        ).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(0.0, row[0] - time.time()))
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt number"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _mark_sent(self, job_id: int):
+        """Remove a delivered message"""
+        self._db.execute("DELETE FROM email_outbox WHERE id = ?", (job_id,))
+        # The submission's next email, if any, can go now
+        self._wakeup.set()
+        self.sent_total += 1
+        now = time.monotonic()
+        self._sent_times.append(now)
+        self._trim_sent_times(now)
+
+    def _trim_sent_times(self, now: float):
+        """Forget sends older than the drain rate window"""
+        cutoff = now - DRAIN_RATE_WINDOW
+        while self._sent_times and self._sent_times[0] < cutoff:
+            self._sent_times.popleft()
+
+    def _mark_failed(self, job_id: int, attempts: int, error: str):
+        """Schedule a retry, or dead-letter the message once attempts run out"""
+        if attempts >= self.max_attempts:
+            self._db.execute(
+                "UPDATE email_outbox SET state = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                (attempts, error, job_id)
+            )
+            self.dead_lettered_total += 1
+            self._wakeup.set()
+            print(f"Dead-lettered email {job_id} after {attempts} attempts: {error}")
+        else:
+            self._db.execute(
+                "UPDATE email_outbox SET attempts = ?, available_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + self._backoff(attempts), error, job_id)
+            )
+            self.retried_total += 1
+
+    async def _deliver(self, job_id: int, payload: str, attempts: int):
+        """Send one claimed message and record the outcome"""
+        error = "Mailgun rejected the message"
+        try:
+            success = await self.mailgun_service.send_status_update_email(**json.loads(payload))
+        except Exception as e:
+            success = False
+            error = str(e)
+
+        if success:
+            self._mark_sent(job_id)
+        else:
+            self._mark_failed(job_id, attempts + 1, error)
+
+    async def _worker(self, index: int):
+        """Drain due messages until stopped"""
+        while self._running:
+            try:
+                self._wakeup.clear()
+                jobs = self._claim()
+                if jobs:
+                    await asyncio.gather(*(self._deliver(*job) for job in jobs))
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._seconds_until_due())
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Email outbox worker {index} error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        """Start the worker pool"""
+        if self._running:
+            return
+        self._running = True
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+        print(f"Email outbox started with {self.worker_count} workers ({self.path})")
+
+    async def stop(self, timeout: float = 5.0):
+        """Stop the workers, letting in-flight sends finish within the timeout"""
+        self._running = False
+        self._wakeup.set()
+        if self._workers:
+            _, pending = await asyncio.wait(self._workers, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and drain rate for monitoring"""
+        counts = dict(self._db.execute(
+            "SELECT state, COUNT(*) FROM email_outbox GROUP BY state"
+        ).fetchall())
+
+        self._trim_sent_times(time.monotonic())
+
+        return {
+            "depth": counts.get("pending", 0),
+            "dead_letters": counts.get("dead", 0),
+            "workers": len(self._workers),
+            "sent_total": self.sent_total,
+            "retried_total": self.retried_total,
+            "dead_lettered_total": self.dead_lettered_total,
+            "drain_rate_per_sec": round(len(self._sent_times) / DRAIN_RATE_WINDOW, 3)
+        }
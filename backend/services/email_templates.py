@@ -0,0 +1,263 @@
+"""
+Precompiled email templates for submission status notifications
+"""
+
+import html
+import os
+import string
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from config import config
+
+
+_FORMATTER = string.Formatter()
+
+# Email parts and the override file each one is loaded from
+TEMPLATE_PARTS = {
+    "subject": "{status}.subject.txt",
+    "html": "{status}.html",
+    "text": "{status}.txt"
+}
+
+# Fields each part is rendered with; an override using any other is rejected
+TEMPLATE_FIELDS = {
+    "subject": frozenset({"title"}),
+    "html": frozenset({"title", "feedback_html"}),
+    "text": frozenset({"title", "feedback_text"})
+}
+
+DEFAULT_STATUS = "pending"
+
+# Optional feedback blocks, included only when there is feedback
+FEEDBACK_HTML_PREFIX = "<p><strong>Feedback:</strong> "
+FEEDBACK_HTML_SUFFIX = "</p>"
+FEEDBACK_TEXT_PREFIX = "Feedback: "
+
+DEFAULT_TEMPLATES = {
+    "approved": {
+        "subject": "🎉 Your Submission Has Been Approved!",
+        "html": """
+                <html>
+                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                    <h2 style="color: #10b981;">Great News!</h2>
+                    <p>Your submission "<strong>{title}</strong>" has been <strong>approved</strong>!</p>
+                    <p>Congratulations! We're excited to work with you on this project.</p>
+                    {feedback_html}
+                    <p>Thank you for your submission and we look forward to hearing more from you!</p>
+                    <hr style="margin: 20px 0;">
+                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+                </body>
+                </html>
+                """,
+        "text": "Great News! Your submission '{title}' has been approved! Congratulations! We're excited to work with you on this project. {feedback_text} Thank you for your submission and we look forward to hearing more from you! Best regards, The MeloTech Team"
+    },
+    "in-review": {
+        "subject": "Your Submission is Now In Review",
+        "html": """
+                <html>
+                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                    <h2 style="color: #3b82f6;">Submission In Review</h2>
+                    <p>Your submission "<strong>{title}</strong>" is now being reviewed by our team.</p>
+                    <p>This is an exciting step! Our team will carefully evaluate your submission and provide detailed feedback.</p>
+                    <p>We'll notify you as soon as the review is complete.</p>
+                    <hr style="margin: 20px 0;">
+                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+                </body>
+                </html>
+                """,
+        "text": "Your submission '{title}' is now being reviewed by our team. This is an exciting step! Our team will carefully evaluate your submission and provide detailed feedback. We'll notify you as soon as the review is complete. Best regards, The MeloTech Team"
+    },
+    "rejected": {
+        "subject": "Update on Your Submission",
+        "html": """
+                <html>
+                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                    <h2 style="color: #ef4444;">Submission Update</h2>
+                    <p>Thank you for your submission "<strong>{title}</strong>".</p>
+                    <p>Unfortunately, we won't be able to move forward with this particular submission at this time.</p>
+                    {feedback_html}
+                    <p>We encourage you to keep creating and submitting new work. We're always looking for fresh talent!</p>
+                    <hr style="margin: 20px 0;">
+                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+                </body>
+                </html>
+                """,
+        "text": "Thank you for your submission '{title}'. Unfortunately, we won't be able to move forward with this particular submission at this time. {feedback_text} We encourage you to keep creating and submitting new work. We're always looking for fresh talent! Best regards, The MeloTech Team"
+    },
+    "pending": {
+        "subject": "Your Submission is Under Review",
+        "html": """
+                <html>
+                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+                    <h2 style="color: #f59e0b;">Submission Under Review</h2>
+                    <p>Your submission "<strong>{title}</strong>" is now under review.</p>
+                    <p>We'll get back to you as soon as possible with our decision.</p>
+                    <p>Thank you for your patience!</p>
+                    <hr style="margin: 20px 0;">
+                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
+                </body>
+                </html>
+                """,
+        "text": "Your submission '{title}' is now under review. We'll get back to you as soon as possible with our decision. Thank you for your patience! Best regards, The MeloTech Team"
+    }
+}
+
+
+def escape_html(value: str) -> str:
+    """Escape a value for HTML, skipping the copy when nothing needs escaping"""
+    if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+        return html.escape(value)
+    return value
+
+
+class CompiledTemplate:
+    """A template parsed once into literals and field names, rendered with a single join"""
+
+    __slots__ = ("source", "fields", "parts")
+
+    def __init__(self, source: str, allowed: Optional[FrozenSet[str]] = None):
+        """Parse a template; raises ValueError for bad braces or fields outside `allowed`"""
+        self.source = source
+        self.fields: List[str] = []
+        # (is_field, text): literal text, or the name of a field to look up
+        self.parts: List[Tuple[bool, str]] = []
+        for literal, field, format_spec, conversion in _FORMATTER.parse(source):
+            if literal:
+                self.parts.append((False, literal))
+            if field is not None:
+                if (allowed is not None and field not in allowed) or format_spec or conversion:
+                    # Most often CSS or other literal braces that were not doubled
+                    raise ValueError(
+                        f"unknown placeholder {{{field}}} (allowed: {', '.join(sorted(allowed or ()))}); "
+                        f"write literal braces as {{{{ and }}}}"
+                    )
+                self.fields.append(field)
+                self.parts.append((True, field))
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Fill in the fields; values must already be escaped for the target format"""
+        return "".join([values.get(text, "") if is_field else text for is_field, text in self.parts])
+
+
+class EmailTemplateRegistry:
+    """Compiled status templates with optional hot-reloaded file overrides"""
+
+    def __init__(self, template_dir: Optional[str] = None, reload_interval: float = 2.0):
+        self.template_dir = template_dir
+        self.reload_interval = reload_interval
+        self._templates: Dict[str, Dict[str, CompiledTemplate]] = {}
+        self._batch_templates: Dict[str, Dict[str, str]] = {}
+        self._mtimes: Dict[str, Tuple[Optional[float], ...]] = {}
+        self._checked_at: Dict[str, float] = {}
+
+        for status in DEFAULT_TEMPLATES:
+            self._compile(status)
+
+    def _override_mtimes(self, status: str) -> Tuple[Optional[float], ...]:
+        """Modification times of a status's override files (None when absent)"""
+        mtimes = []
+        for filename in TEMPLATE_PARTS.values():
+            try:
+                mtimes.append(os.stat(os.path.join(self.template_dir, filename.format(status=status))).st_mtime)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _compile(self, status: str):
+        """Compile a status template from its override files or the defaults"""
+        sources = dict(DEFAULT_TEMPLATES[status])
+
+        if self.template_dir:
+            mtimes = self._override_mtimes(status)
+            for (part, filename), mtime in zip(TEMPLATE_PARTS.items(), mtimes):
+                if mtime is None:
+                    continue
+                try:
+                    with open(os.path.join(self.template_dir, filename.format(status=status)), encoding="utf-8") as f:
+                        sources[part] = f.read()
+                except OSError as e:
+                    print(f"Error loading email template override for '{status}': {str(e)}")
+            self._mtimes[status] = mtimes
+            self._checked_at[status] = time.monotonic()
+
+        previous = self._templates.get(status, {})
+        compiled = {}
+        for part, source in sources.items():
+            try:
+                compiled[part] = CompiledTemplate(source, TEMPLATE_FIELDS[part])
+            except ValueError as e:
+                # Keep sending the last good template rather than a broken one
+                print(f"Invalid email template override for '{status}' ({part}): {str(e)}")
+                compiled[part] = previous.get(part) or CompiledTemplate(DEFAULT_TEMPLATES[status][part])
+        self._templates[status] = compiled
+        self._batch_templates[status] = {
+            "subject": compiled["subject"].render({
+                "title": "%recipient.title%"
+            }),
+            "html": compiled["html"].render({
+                "title": "%recipient.title_html%",
+                "feedback_html": "%recipient.feedback_html%"
+            }),
+            "text": compiled["text"].render({
+                "title": "%recipient.title%",
+                "feedback_text": "%recipient.feedback_text%"
+            })
+        }
+
+    def _get_compiled(self, status: str) -> Tuple[str, Dict[str, CompiledTemplate]]:
+        """Look up a status template, reloading it if its override files changed"""
+        if status not in self._templates:
+            status = DEFAULT_STATUS
+
+        if self.template_dir:
+            now = time.monotonic()
+            if now - self._checked_at.get(status, 0.0) >= self.reload_interval:
+                self._checked_at[status] = now
+                if self._override_mtimes(status) != self._mtimes.get(status):
+                    print(f"Reloading email template for status '{status}'")
+                    self._compile(status)
+
+        return status, self._templates[status]
+
+    def render(self, status: str, submission_title: str, feedback: str = "") -> Dict[str, str]:
+        """Render subject, HTML and text for one status, escaping values in the HTML"""
+        if self.template_dir:
+            _, compiled = self._get_compiled(status)
+        else:
+            compiled = self._templates.get(status) or self._templates[DEFAULT_STATUS]
+        if feedback:
+            feedback_html = f"{FEEDBACK_HTML_PREFIX}{escape_html(feedback)}{FEEDBACK_HTML_SUFFIX}"
+            feedback_text = f"{FEEDBACK_TEXT_PREFIX}{feedback}"
+        else:
+            feedback_html = feedback_text = ""
+        text_values = {"title": submission_title, "feedback_text": feedback_text}
+
+        return {
+            "subject": compiled["subject"].render(text_values),
+            "html": compiled["html"].render({
+                "title": escape_html(submission_title),
+                "feedback_html": feedback_html
+            }),
+            "text": compiled["text"].render(text_values)
+        }
+
+    def render_batch(self, status: str) -> Dict[str, str]:
+        """Get a status template with Mailgun %recipient.*% placeholders"""
+        status, _ = self._get_compiled(status)
+        return self._batch_templates[status]
+
+    def recipient_variables(self, submission_title: str, feedback: str = "") -> Dict[str, str]:
+        """Per-recipient values for a batch template, with HTML values escaped"""
+        return {
+            "title": submission_title,
+            "title_html": escape_html(submission_title),
+            "feedback_html": f"{FEEDBACK_HTML_PREFIX}{escape_html(feedback)}{FEEDBACK_HTML_SUFFIX}" if feedback else "",
+            "feedback_text": f"{FEEDBACK_TEXT_PREFIX}{feedback}" if feedback else ""
+        }
+
+
+# Global template registry, compiled once at import
+email_templates = EmailTemplateRegistry(
+    config.EMAIL_TEMPLATE_DIR,
+    config.EMAIL_TEMPLATE_RELOAD_INTERVAL
+)
@@ -0,0 +1,123 @@
+"""
+JSON codec shared by the webhooks, WebSocket broadcasts and API responses
+
+Uses orjson when installed, then msgspec, and the standard library otherwise.
+JSON_CODEC pins one of them.
+"""
+
+import json
+from typing import Any, Callable, Dict, Optional, Union
+from fastapi.responses import JSONResponse
+from config import config
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is the fallback
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional too
+    msgspec = None
+
+
+class Codec:
+    """loads and dumps for one JSON library, all producing compact UTF-8 JSON"""
+
+    __slots__ = ("name", "loads", "dumps", "dumps_bytes")
+
+    def __init__(self, name: str, loads: Callable, dumps: Callable, dumps_bytes: Callable):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.dumps_bytes = dumps_bytes
+
+
+# Encoders are built once per `default`; json.dumps with arguments builds one per call
+_json_encoders: Dict[Optional[Callable[[Any], Any]], json.JSONEncoder] = {}
+
+
+def _json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    encoder = _json_encoders.get(default)
+    if encoder is None:
+        # Same output shape as orjson: no spaces after separators, non-ASCII left as UTF-8
+        encoder = _json_encoders[default] = json.JSONEncoder(
+            separators=(",", ":"), ensure_ascii=False, default=default
+        )
+    return encoder.encode(obj)
+
+
+def _json_dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    return _json_dumps(obj, default).encode("utf-8")
+
+
+# Installed codecs, fastest first
+CODECS: Dict[str, Codec] = {}
+
+if orjson is not None:
+    def _orjson_dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+    def _orjson_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        return _orjson_dumps_bytes(obj, default).decode("utf-8")
+
+    CODECS["orjson"] = Codec("orjson", orjson.loads, _orjson_dumps, _orjson_dumps_bytes)
+
+if msgspec is not None:
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+
+    def _msgspec_dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        if default is None:
+            return _msgspec_encoder.encode(obj)
+        return msgspec.json.encode(obj, enc_hook=default)
+
+    def _msgspec_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        return _msgspec_dumps_bytes(obj, default).decode("utf-8")
+
+    CODECS["msgspec"] = Codec("msgspec", _msgspec_decoder.decode, _msgspec_dumps, _msgspec_dumps_bytes)
+
+CODECS["json"] = Codec("json", json.loads, _json_dumps, _json_dumps_bytes)
+
+
+def select_codec(name: str = "auto") -> Codec:
+    """The named codec, or the fastest installed one for "auto" or an unavailable name"""
+    if name in CODECS:
+        return CODECS[name]
+    if name != "auto":
+        print(f"JSON codec {name} is not installed, using {next(iter(CODECS))}")
+    return next(iter(CODECS.values()))
+
+
+codec = select_codec(config.JSON_CODEC)
+
+# Which implementation is in use, for /health
+BACKEND = codec.name
+
+# Errors loads() raises for malformed input, whichever codec is in use
+# (orjson's JSONDecodeError subclasses json.JSONDecodeError)
+DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError) + (
+    (msgspec.DecodeError,) if msgspec is not None else ()
+)
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Parse JSON, straight from bytes when given bytes (no decode to str first)"""
+    return codec.loads(data)
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serialise to compact JSON text"""
+    return codec.dumps(obj, default)
+
+
+def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialise to compact UTF-8 JSON bytes, ready to send"""
+    return codec.dumps_bytes(obj, default)
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered with the codec instead of json.dumps"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,77 @@
+"""
+Executor that keeps per-key ordering while running different keys in parallel
+"""
+
+import asyncio
+import itertools
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class KeyedExecutor:
+    """Runs items with the same key strictly in order, and different keys across N workers"""
+
+    def __init__(self, process: Callable[[Any], Awaitable[None]], worker_count: int):
+        self.process = process
+        self.worker_count = worker_count
+        # One FIFO queue and one worker per shard; a key always maps to the same shard
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+        # Items without a key have no ordering to keep, so they are spread round-robin
+        self._round_robin = itertools.count()
+
+    def shard(self, key: Optional[Hashable]) -> int:
+        """The worker that handles a key"""
+        if key is None:
+            return next(self._round_robin) % self.worker_count
+        # crc32 rather than hash() so a key maps to the same shard in every process
+        return zlib.crc32(str(key).encode("utf-8")) % self.worker_count
+
+    def submit(self, key: Optional[Hashable], item: Any):
+        """Queue an item behind any earlier items with the same key"""
+        self._queues[self.shard(key)].put_nowait(item)
+
+    async def _worker(self, index: int):
+        """Process one shard's items in order"""
+        queue = self._queues[index]
+        while True:
+            item = await queue.get()
+            try:
+                await self.process(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Keyed executor worker {index} error: {str(e)}")
+            finally:
+                queue.task_done()
+
+    def start(self):
+        """Start one worker per shard"""
+        self._queues = [asyncio.Queue() for _ in range(self.worker_count)]
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+
+    async def join(self):
+        """Wait until every queued item has been processed"""
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+
+    async def stop(self):
+        """Cancel the workers, dropping anything still queued"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def depths(self) -> List[int]:
+        """Queued items per shard"""
+        return [queue.qsize() for queue in self._queues]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Shard count and queue depths"""
+        depths = self.depths()
+        return {
+            "shards": self.worker_count,
+            "depth": sum(depths),
+            "max_shard_depth": max(depths) if depths else 0
+        }
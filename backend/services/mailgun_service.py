@@ -2,9 +2,12 @@
 Mailgun email service for sending submission status notifications
 """
 
-import requests
-from typing import Optional
+import asyncio
+import json
+import httpx
+from typing import Optional, Dict, List, Tuple
 from config import config
+from services.email_templates import email_templates
 
 
 class MailgunService:
@@ -14,9 +17,34 @@ class MailgunService:
         self.api_key = config.MAILGUN_API_KEY
         self.domain = config.MAILGUN_DOMAIN
         self.from_email = config.MAILGUN_FROM_EMAIL
-        self.base_url = f"https://api.mailgun.net/v3/{self.domain}"
+        self.base_url = f"{config.MAILGUN_API_URL}/{self.domain}"
+        self.templates = email_templates
+        self.timeout = httpx.Timeout(config.MAILGUN_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=config.MAILGUN_MAX_CONNECTIONS,
+            max_keepalive_connections=config.MAILGUN_MAX_CONNECTIONS
+        )
+        # Caps in-flight requests so a burst queues here instead of in the pool
+        self._semaphore = asyncio.Semaphore(config.MAILGUN_MAX_CONCURRENCY)
+        self._client: Optional[httpx.AsyncClient] = None
     
-    def send_status_update_email(
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared keep-alive HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                auth=("api", self.api_key),
+                timeout=self.timeout,
+                limits=self.limits
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client and its pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def send_status_update_email(
         self, 
         user_email: str, 
         submission_title: str, 
@@ -25,20 +53,20 @@ class MailgunService:
     ) -> bool:
         """Send email notification when submission status is updated"""
         
-        template = self._get_email_template(status, submission_title, feedback)
+        template = self.templates.render(status, submission_title, feedback)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/messages",
-                auth=("api", self.api_key),
-                data={
-                    "from": self.from_email,
-                    "to": user_email,
-                    "subject": template["subject"],
-                    "text": template["text"],
-                    "html": template["html"]
-                }
-            )
+            async with self._semaphore:
+                response = await self._get_client().post(
+                    f"{self.base_url}/messages",
+                    data={
+                        "from": self.from_email,
+                        "to": user_email,
+                        "subject": template["subject"],
+                        "text": template["text"],
+                        "html": template["html"]
+                    }
+                )
             
             if response.status_code == 200:
                 print(f"Email sent successfully to {user_email} for submission '{submission_title}' with status '{status}'")
@@ -47,80 +75,167 @@ class MailgunService:
                 print(f"Failed to send email: {response.status_code} - {response.text}")
                 return False
                 
+        except httpx.TimeoutException:
+            print(f"Timed out sending email to {user_email} after {config.MAILGUN_TIMEOUT}s")
+            return False
         except Exception as e:
             print(f"Error sending email: {str(e)}")
             return False
     
-    def _get_email_template(self, status: str, submission_title: str, feedback: str) -> dict:
-        """Get email template based on status"""
+    async def send_batch(self, status: str, recipients: List[Dict[str, str]]) -> Optional[int]:
+        """Send one status email to many recipients with Mailgun batch sending; returns the HTTP status (None if no response)"""
         
-        templates = {
-            "approved": {
-                "subject": "🎉 Your Submission Has Been Approved!",
-                "html": f"""
-                <html>
-                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #10b981;">Great News!</h2>
-                    <p>Your submission "<strong>{submission_title}</strong>" has been <strong>approved</strong>!</p>
-                    <p>Congratulations! We're excited to work with you on this project.</p>
-                    {f'<p><strong>Feedback:</strong> {feedback}</p>' if feedback else ''}
-                    <p>Thank you for your submission and we look forward to hearing more from you!</p>
-                    <hr style="margin: 20px 0;">
-                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
-                </body>
-                </html>
-                """,
-                "text": f"Great News! Your submission '{submission_title}' has been approved! Congratulations! We're excited to work with you on this project. {f'Feedback: {feedback}' if feedback else ''} Thank you for your submission and we look forward to hearing more from you! Best regards, The MeloTech Team"
-            },
-            "in-review": {
-                "subject": "Your Submission is Now In Review",
-                "html": f"""
-                <html>
-                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #3b82f6;">Submission In Review</h2>
-                    <p>Your submission "<strong>{submission_title}</strong>" is now being reviewed by our team.</p>
-                    <p>This is an exciting step! Our team will carefully evaluate your submission and provide detailed feedback.</p>
-                    <p>We'll notify you as soon as the review is complete.</p>
-                    <hr style="margin: 20px 0;">
-                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
-                </body>
-                </html>
-                """,
-                "text": f"Your submission '{submission_title}' is now being reviewed by our team. This is an exciting step! Our team will carefully evaluate your submission and provide detailed feedback. We'll notify you as soon as the review is complete. Best regards, The MeloTech Team"
-            },
-            "rejected": {
-                "subject": "Update on Your Submission",
-                "html": f"""
-                <html>
-                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #ef4444;">Submission Update</h2>
-                    <p>Thank you for your submission "<strong>{submission_title}</strong>".</p>
-                    <p>Unfortunately, we won't be able to move forward with this particular submission at this time.</p>
-                    {f'<p><strong>Feedback:</strong> {feedback}</p>' if feedback else ''}
-                    <p>We encourage you to keep creating and submitting new work. We're always looking for fresh talent!</p>
-                    <hr style="margin: 20px 0;">
-                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
-                </body>
-                </html>
-                """,
-                "text": f"Thank you for your submission '{submission_title}'. Unfortunately, we won't be able to move forward with this particular submission at this time. {f'Feedback: {feedback}' if feedback else ''} We encourage you to keep creating and submitting new work. We're always looking for fresh talent! Best regards, The MeloTech Team"
-            },
-            "pending": {
-                "subject": "Your Submission is Under Review",
-                "html": f"""
-                <html>
-                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #f59e0b;">Submission Under Review</h2>
-                    <p>Your submission "<strong>{submission_title}</strong>" is now under review.</p>
-                    <p>We'll get back to you as soon as possible with our decision.</p>
-                    <p>Thank you for your patience!</p>
-                    <hr style="margin: 20px 0;">
-                    <p style="color: #6b7280; font-size: 14px;">Best regards,<br>The MeloTech Team</p>
-                </body>
-                </html>
-                """,
-                "text": f"Your submission '{submission_title}' is now under review. We'll get back to you as soon as possible with our decision. Thank you for your patience! Best regards, The MeloTech Team"
-            }
+        template = self.templates.render_batch(status)
+        recipient_variables = {
+            recipient["user_email"]: self.templates.recipient_variables(
+                recipient["submission_title"], recipient["feedback"]
+            )
+            for recipient in recipients
         }
         
-        return templates.get(status, templates["pending"])
+        try:
+            async with self._semaphore:
+                response = await self._get_client().post(
+                    f"{self.base_url}/messages",
+                    data={
+                        "from": self.from_email,
+                        "to": list(recipient_variables.keys()),
+                        "subject": template["subject"],
+                        "text": template["text"],
+                        "html": template["html"],
+                        "recipient-variables": json.dumps(recipient_variables)
+                    }
+                )
+            
+            if response.status_code == 200:
+                print(f"Batch email sent successfully to {len(recipients)} recipients with status '{status}'")
+            else:
+                print(f"Failed to send batch email: {response.status_code} - {response.text}")
+            return response.status_code
+                
+        except httpx.TimeoutException:
+            print(f"Timed out sending batch email to {len(recipients)} recipients after {config.MAILGUN_TIMEOUT}s")
+            return None
+        except Exception as e:
+            print(f"Error sending batch email: {str(e)}")
+            return None
+
+
+# 4xx responses that say nothing about the messages themselves (credentials,
+# domain, rate limit); a batch rejected with any other 4xx is split and retried
+UNSPLITTABLE_STATUSES = (401, 403, 404, 429)
+
+
+class MailgunBatcher:
+    """Collects status emails over a short window and sends them as Mailgun batches"""
+    
+    def __init__(self, mailgun_service: MailgunService):
+        self.mailgun_service = mailgun_service
+        self.window = config.MAILGUN_BATCH_WINDOW
+        # Mailgun accepts at most 1000 recipients per batch call
+        self.max_batch = min(config.MAILGUN_BATCH_MAX, 1000)
+        self._groups: Dict[str, List[Tuple[Dict[str, str], asyncio.Future]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_tasks: set = set()
+        
+        # Counters for /health
+        self.messages_total = 0
+        self.requests_total = 0
+        self.batches_split = 0
+    
+    async def send_status_update_email(
+        self,
+        user_email: str,
+        submission_title: str,
+        status: str,
+        feedback: str = ""
+    ) -> bool:
+        """Queue an email for the next batch and wait for its delivery result"""
+        
+        future = asyncio.get_running_loop().create_future()
+        group = self._groups.setdefault(status, [])
+        group.append(({
+            "user_email": user_email,
+            "submission_title": submission_title,
+            "feedback": feedback or ""
+        }, future))
+        self.messages_total += 1
+        
+        if len(group) >= self.max_batch:
+            self._flush_group(status)
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        
+        return await future
+    
+    async def _flush_after_window(self):
+        """Flush every group once the collection window closes"""
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        for status in list(self._groups):
+            self._flush_group(status)
+    
+    def _flush_group(self, status: str):
+        """Split a status group into batch requests and send them"""
+        pending = self._groups.pop(status, [])
+        
+        # recipient-variables is keyed by address, so an address can only
+        # appear once per request
+        chunks: List[List[Tuple[Dict[str, str], asyncio.Future]]] = []
+        chunk_emails: List[set] = []
+        for item in pending:
+            email = item[0]["user_email"]
+            for chunk, emails in zip(chunks, chunk_emails):
+                if len(chunk) < self.max_batch and email not in emails:
+                    chunk.append(item)
+                    emails.add(email)
+                    break
+            else:
+                chunks.append([item])
+                chunk_emails.append({email})
+        
+        for chunk in chunks:
+            task = asyncio.create_task(self._send_chunk(status, chunk))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+    
+    async def _send_chunk(self, status: str, chunk: List[Tuple[Dict[str, str], asyncio.Future]]):
+        """Send one batch request and resolve the waiting callers"""
+        try:
+            results = await self._send_recipients(status, [recipient for recipient, _ in chunk])
+        except Exception as e:
+            print(f"Error sending email batch: {str(e)}")
+            results = [False] * len(chunk)
+        
+        for (_, future), success in zip(chunk, results):
+            if not future.done():
+                future.set_result(success)
+    
+    async def _send_recipients(self, status: str, recipients: List[Dict[str, str]]) -> List[bool]:
+        """Send recipients in one request, splitting a rejected batch so only the bad messages fail"""
+        self.requests_total += 1
+        if len(recipients) == 1:
+            return [await self.mailgun_service.send_status_update_email(status=status, **recipients[0])]
+        
+        code = await self.mailgun_service.send_batch(status, recipients)
+        if code == 200:
+            return [True] * len(recipients)
+        if code is not None and 400 <= code < 500 and code not in UNSPLITTABLE_STATUSES:
+            # e.g. one invalid address fails the whole batch: halve until it is alone
+            self.batches_split += 1
+            middle = len(recipients) // 2
+            first, second = await asyncio.gather(
+                self._send_recipients(status, recipients[:middle]),
+                self._send_recipients(status, recipients[middle:])
+            )
+            return first + second
+        return [False] * len(recipients)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Batching counters for monitoring"""
+        return {
+            "messages_total": self.messages_total,
+            "requests_total": self.requests_total,
+            "batches_split": self.batches_split,
+            "pending": sum(len(group) for group in self._groups.values())
+        }
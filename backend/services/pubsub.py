@@ -0,0 +1,122 @@
+"""
+Pub/sub backends for fanning WebSocket events out across workers
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+from config import config
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # Redis is only needed when PUBSUB_URL is set
+    redis_asyncio = None
+
+
+# Called with each message received on the channel
+MessageHandler = Callable[[str], Awaitable[None]]
+
+
+class InMemoryPubSub:
+    """Single-process backend: publishing delivers straight to the local handler"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._handler: Optional[MessageHandler] = None
+        self.published = 0
+
+    async def start(self, handler: MessageHandler):
+        """Register the handler that receives every published message"""
+        self._handler = handler
+
+    async def publish(self, message: str):
+        """Deliver a message to this process"""
+        self.published += 1
+        if self._handler is not None:
+            await self._handler(message)
+
+    async def stop(self):
+        """Stop delivering messages"""
+        self._handler = None
+
+
+class RedisPubSub:
+    """Redis backend: every worker subscribes to one channel and fans out locally"""
+
+    name = "redis"
+
+    def __init__(self, url: str, channel: str, client=None):
+        if client is None and redis_asyncio is None:
+            raise RuntimeError("PUBSUB_URL is set but the 'redis' package is not installed (pip install redis)")
+        self.url = url
+        self.channel = channel
+        self._client = client
+        self._pubsub = None
+        self._handler: Optional[MessageHandler] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+        self.published = 0
+        self.received = 0
+
+    async def start(self, handler: MessageHandler):
+        """Subscribe to the channel and start the listener task"""
+        self._handler = handler
+        if self._client is None:
+            self._client = redis_asyncio.from_url(self.url, decode_responses=True)
+        self._listener = asyncio.create_task(self._listen())
+        await self._subscribed.wait()
+        print(f"WebSocket pub/sub subscribed to Redis channel '{self.channel}'")
+
+    async def _listen(self):
+        """Receive messages, resubscribing with backoff if the connection drops"""
+        delay = 0.5
+        while True:
+            try:
+                self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                await self._pubsub.subscribe(self.channel)
+                self._subscribed.set()
+                delay = 0.5
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    self.received += 1
+                    try:
+                        await self._handler(message["data"])
+                    except Exception as e:
+                        print(f"Error handling pub/sub message: {str(e)}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis pub/sub connection error, retrying in {delay}s: {str(e)}")
+                self._subscribed.set()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def publish(self, message: str):
+        """Publish a message to every subscribed worker, this one included"""
+        self.published += 1
+        await self._client.publish(self.channel, message)
+
+    async def stop(self):
+        """Unsubscribe and close the connection"""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_pubsub(url: Optional[str] = None, channel: Optional[str] = None):
+    """Pick a backend from PUBSUB_URL: Redis when set, in-memory otherwise"""
+    url = url if url is not None else config.PUBSUB_URL
+    if url:
+        return RedisPubSub(url, channel or config.PUBSUB_CHANNEL)
+    return InMemoryPubSub()
@@ -2,40 +2,200 @@
 Supabase service for database operations
 """
 
-from typing import Optional
-from supabase import create_client, Client
+import hashlib
+import json
+import httpx
+from datetime import datetime
+from typing import Optional, Callable, Dict, Any, Iterable, List, Tuple
+from supabase import AsyncClient
+from supabase.lib.client_options import AsyncClientOptions
 from config import config
+from services.cache import TTLCache
 
 
-class SupabaseService:
-    """Service for Supabase database operations"""
+def is_older(updated_at: Any, than: Any) -> bool:
+    """Whether one updated_at timestamp is strictly older than another (False if either is unknown)"""
+    try:
+        return datetime.fromisoformat(updated_at) < datetime.fromisoformat(than)
+    except (TypeError, ValueError):
+        return False
+
+
+def submission_etag(submission: dict) -> str:
+    """Strong ETag for a submission row"""
+    body = json.dumps(submission, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+
+
+class AsyncSupabaseService:
+    """Async service for Supabase database operations over a shared HTTP/2 pool"""
     
     def __init__(self):
-        self.client: Client = create_client(
-            config.SUPABASE_URL, 
-            config.SUPABASE_SERVICE_ROLE_KEY
-        )
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional[AsyncClient] = None
+        # userid -> authid -> email lookups, invalidated by the users webhook
+        self.authid_cache = TTLCache(config.USER_CACHE_MAX_SIZE, config.USER_CACHE_TTL)
+        self.email_cache = TTLCache(config.USER_CACHE_MAX_SIZE, config.USER_CACHE_TTL)
+        # submission id -> (row, ETag); filled on read, dropped by webhooks and updates
+        self.submission_cache = TTLCache(config.SUBMISSION_CACHE_MAX_SIZE, config.SUBMISSION_CACHE_TTL)
+        # Drop counter and submission id -> counter at its last drop, so a read that
+        # started before its row was dropped does not cache the row it read
+        self._submission_drops = 0
+        self._dropped_at = TTLCache(config.SUBMISSION_CACHE_MAX_SIZE, config.SUBMISSION_CACHE_TTL)
+        # Sends invalidations to the other workers: publish(kind, payload)
+        self.publish_invalidation: Optional[Callable[[str, Any], None]] = None
     
-    def get_user_email_by_authid(self, authid: str) -> Optional[str]:
-        """Get user email from Supabase auth.users table using authid"""
-        try:
-            # Query the auth.users table to get email
-            response = self.client.table("auth.users").select("email").eq("id", authid).execute()
-            
-            if response.data and len(response.data) > 0:
-                return response.data[0]["email"]
+    def _split_cached_userids(self, userids: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Split userids into cached emails and the ids that still need a query"""
+        emails: Dict[str, str] = {}
+        missing = []
+        for userid in dict.fromkeys(filter(None, userids)):
+            authid = self.authid_cache.get(userid)
+            email = self.email_cache.get(authid) if authid is not None else None
+            if email is not None:
+                emails[userid] = email
             else:
-                print(f"No user found with authid: {authid}")
-                return None
-                
-        except Exception as e:
-            print(f"Error fetching user email: {str(e)}")
-            return None
+                missing.append(userid)
+        return emails, missing
+    
+    def _split_cached_authids(self, authids: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Split authids into cached emails and the ids that still need a query"""
+        emails: Dict[str, str] = {}
+        missing = []
+        for authid in dict.fromkeys(filter(None, authids)):
+            email = self.email_cache.get(authid)
+            if email is not None:
+                emails[authid] = email
+            else:
+                missing.append(authid)
+        return emails, missing
+    
+    def _cache_user_rows(self, rows: list) -> list:
+        """Cache rows returned by get_user_emails and keep the ones with an email"""
+        for row in rows:
+            if row.get("userid"):
+                self.authid_cache.set(row["userid"], row["authid"])
+            if row.get("email"):
+                self.email_cache.set(row["authid"], row["email"])
+        return [row for row in rows if row.get("email")]
     
-    def get_submission_by_id(self, submission_id: str) -> Optional[dict]:
+    def invalidate_user(self, userid: Optional[str] = None, authids: Iterable[str] = ()):
+        """Drop cached lookups for a user after their record changes, on every worker"""
+        authids = [authid for authid in authids if authid]
+        self.drop_user(userid, authids)
+        if self.publish_invalidation is not None:
+            self.publish_invalidation("user", {"userid": userid, "authids": authids})
+    
+    def drop_user(self, userid: Optional[str] = None, authids: Iterable[str] = ()):
+        """Drop cached lookups for a user on this worker"""
+        if userid:
+            self.authid_cache.delete(userid)
+        for authid in authids:
+            if authid:
+                self.email_cache.delete(authid)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the user lookup caches"""
+        return {
+            "authid_by_userid": self.authid_cache.get_stats(),
+            "email_by_authid": self.email_cache.get_stats()
+        }
+    
+    @property
+    def client(self) -> AsyncClient:
+        """Get the shared Supabase client, creating it and its pool on first use"""
+        if self._client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(config.SUPABASE_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=config.SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.SUPABASE_MAX_CONNECTIONS
+                ),
+                follow_redirects=True
+            )
+            self._client = AsyncClient(
+                config.SUPABASE_URL,
+                config.SUPABASE_SERVICE_ROLE_KEY,
+                options=AsyncClientOptions(httpx_client=self._http_client)
+            )
+        return self._client
+    
+    async def connect(self):
+        """Create the client up front so the first request doesn't pay for it"""
+        return self.client
+    
+    async def aclose(self):
+        """Close the shared HTTP/2 connection pool"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._client = None
+    
+    async def get_user_email_by_authid(self, authid: str) -> Optional[str]:
+        """Get user email from Supabase auth.users table using authid"""
+        email = (await self.get_user_emails_by_authids([authid])).get(authid)
+        if email is None:
+            print(f"No user found with authid: {authid}")
+        return email
+    
+    def cache_submission(self, submission: dict) -> str:
+        """Store a full submission row in the cache and return its ETag, unless a newer row is cached"""
+        cached = self.submission_cache.get(submission["id"])
+        if cached is not None and is_older(submission.get("updated_at"), cached[0].get("updated_at")):
+            # A read that finished late must not replace a newer row
+            return cached[1]
+        etag = submission_etag(submission)
+        self.submission_cache.set(submission["id"], (submission, etag))
+        return etag
+    
+    def invalidate_submission(self, submission_id: str):
+        """Drop a cached submission, on every worker"""
+        self.invalidate_submissions([submission_id])
+    
+    def invalidate_submissions(self, submission_ids: List[str]):
+        """Drop cached submissions, on every worker"""
+        self.drop_submissions(submission_ids)
+        if self.publish_invalidation is not None:
+            self.publish_invalidation("submission", submission_ids)
+    
+    def drop_submissions(self, submission_ids: Iterable[str]):
+        """Drop cached submissions on this worker"""
+        for submission_id in submission_ids:
+            self._submission_drops += 1
+            self._dropped_at.set(submission_id, self._submission_drops)
+            self.submission_cache.delete(submission_id)
+    
+    def apply_invalidation(self, kind: str, payload: Any):
+        """Apply an invalidation published by any worker"""
+        if kind == "submission":
+            self.drop_submissions(payload)
+        elif kind == "user":
+            self.drop_user(payload.get("userid"), payload.get("authids", ()))
+    
+    async def get_submission_with_etag(self, submission_id: str) -> Tuple[Optional[dict], Optional[str]]:
+        """Get submission and its ETag, from the cache when possible"""
+        cached = self.submission_cache.get(submission_id)
+        if cached is not None:
+            return cached
+        
+        drops, evictions = self._submission_drops, self._dropped_at.evictions
+        submission = await self.get_submission_by_id(submission_id, use_cache=False)
+        if submission is None:
+            return None, None
+        if self._dropped_at.get(submission_id, 0) > drops or self._dropped_at.evictions != evictions:
+            # Dropped while we were reading (or its drop was evicted): the row may
+            # predate the change, so serve it without caching it
+            return submission, submission_etag(submission)
+        return submission, self.cache_submission(submission)
+    
+    async def get_submission_by_id(self, submission_id: str, use_cache: bool = True) -> Optional[dict]:
         """Get submission by ID"""
+        if use_cache:
+            return (await self.get_submission_with_etag(submission_id))[0]
+        
         try:
-            response = self.client.table("submissions").select("*").eq("id", submission_id).execute()
+            response = await self.client.table("submissions").select("*").eq("id", submission_id).execute()
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -47,26 +207,54 @@ class SupabaseService:
             print(f"Error fetching submission: {str(e)}")
             return None
     
-    def get_user_submissions(self, userid: str) -> list:
+    async def get_user_submissions(self, userid: str) -> list:
         """Get all submissions for a specific user"""
         try:
-            response = self.client.table("submissions").select("*").eq("userid", userid).execute()
+            response = await self.client.table("submissions").select("*").eq("userid", userid).execute()
             return response.data or []
             
         except Exception as e:
             print(f"Error fetching user submissions: {str(e)}")
             return []
     
-    def update_submission_status(self, submission_id: str, status: str, feedback: str = "") -> bool:
+    async def get_user_submissions_page(
+        self,
+        userid: str,
+        columns: List[str],
+        limit: int,
+        statuses: Optional[List[str]] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> Optional[list]:
+        """Get one page of a user's submissions, newest first, keyed on (updated_at, id)"""
+        try:
+            query = self.client.table("submissions").select(",".join(columns)).eq("userid", userid)
+            if statuses:
+                query = query.in_("status", statuses)
+            if after:
+                # Rows strictly after the cursor in (updated_at desc, id desc) order
+                updated_at, submission_id = after
+                query = query.or_(
+                    f'updated_at.lt."{updated_at}",'
+                    f'and(updated_at.eq."{updated_at}",id.lt."{submission_id}")'
+                )
+            response = await query.order("updated_at", desc=True).order("id", desc=True).limit(limit).execute()
+            return response.data or []
+            
+        except Exception as e:
+            print(f"Error fetching user submissions page: {str(e)}")
+            return None
+    
+    async def update_submission_status(self, submission_id: str, status: str, feedback: str = "") -> bool:
         """Update submission status and feedback"""
         try:
             update_data = {"status": status}
             if feedback:
                 update_data["feedback"] = feedback
             
-            response = self.client.table("submissions").update(update_data).eq("id", submission_id).execute()
+            response = await self.client.table("submissions").update(update_data).eq("id", submission_id).execute()
             
             if response.data:
+                self.invalidate_submission(submission_id)
                 print(f"Successfully updated submission {submission_id} status to {status}")
                 return True
             else:
@@ -77,13 +265,15 @@ class SupabaseService:
             print(f"Error updating submission: {str(e)}")
             return False
     
-    def update_submission(self, submission_id: str, update_data: dict) -> Optional[dict]:
+    async def update_submission(self, submission_id: str, update_data: dict) -> Optional[dict]:
         """Update submission with any fields"""
         try:
-            response = self.client.table("submissions").update(update_data).eq("id", submission_id).execute()
+            response = await self.client.table("submissions").update(update_data).eq("id", submission_id).execute()
             
             if response.data and len(response.data) > 0:
                 print(f"Successfully updated submission {submission_id}")
+                # Drop the row here and on the other workers; the next read refills it
+                self.invalidate_submission(submission_id)
                 return response.data[0]
             else:
                 print(f"Failed to update submission {submission_id}")
@@ -93,20 +283,110 @@ class SupabaseService:
             print(f"Error updating submission: {str(e)}")
             return None
     
-    def get_user_email_by_userid(self, userid: str) -> Optional[str]:
-        """Get user email from users table using userid"""
+    async def update_submission_with_email(
+        self,
+        submission_id: str,
+        status: Optional[str] = None,
+        rating: Optional[int] = None,
+        feedback: Optional[str] = None
+    ) -> Optional[dict]:
+        """Update a submission and get it back with user_email in one round trip"""
         try:
-            # First get the authid from users table
-            user_response = self.client.table("users").select("authid").eq("id", userid).execute()
+            response = await self.client.rpc("update_submission_with_email", {
+                "p_submission_id": submission_id,
+                "p_status": status,
+                "p_rating": rating,
+                "p_feedback": feedback
+            }).execute()
             
-            if user_response.data and len(user_response.data) > 0:
-                authid = user_response.data[0]["authid"]
-                # Then get email from auth.users
-                return self.get_user_email_by_authid(authid)
+            if response.data:
+                print(f"Successfully updated submission {submission_id}")
+                # The row is projected, so let the next read or webhook refill the cache
+                self.invalidate_submission(submission_id)
+                return response.data
             else:
-                print(f"No user found with userid: {userid}")
+                print(f"Failed to update submission {submission_id}")
                 return None
                 
         except Exception as e:
-            print(f"Error fetching user email by userid: {str(e)}")
-            return None
\ No newline at end of file
+            print(f"Error updating submission: {str(e)}")
+            return None
+    
+    async def bulk_update_submissions_with_email(self, updates: List[Dict[str, Any]]) -> Optional[List[dict]]:
+        """Apply many submission updates in one round trip; rows come back with user_email"""
+        try:
+            response = await self.client.rpc("bulk_update_submissions_with_email", {
+                "p_updates": updates
+            }).execute()
+            
+            rows = response.data or []
+            self.invalidate_submissions([update["id"] for update in updates])
+            print(f"Bulk updated {len(rows)} of {len(updates)} submissions")
+            return rows
+                
+        except Exception as e:
+            print(f"Error bulk updating submissions: {str(e)}")
+            return None
+    
+    async def get_user_email_by_userid(self, userid: str, raise_errors: bool = False) -> Optional[str]:
+        """Get user email from users table using userid (raise_errors: raise instead of returning None on a failed query)"""
+        email = (await self.get_user_emails_by_userids([userid], raise_errors)).get(userid)
+        if email is None:
+            print(f"No user found with userid: {userid}")
+        return email
+    
+    async def get_authid_by_userid(self, userid: str) -> Optional[str]:
+        """Map a users.id to its auth user id, through the lookup cache"""
+        authid = self.authid_cache.get(userid)
+        if authid is None:
+            await self._resolve_user_emails(userids=[userid])
+            authid = self.authid_cache.get(userid)
+        return authid
+    
+    async def verify_user_token(self, userid: str, access_token: str) -> bool:
+        """Check that a Supabase access token belongs to the user with this users.id"""
+        try:
+            response = await self.client.auth.get_user(access_token)
+        except Exception as e:
+            print(f"Error verifying access token: {str(e)}")
+            return False
+        if response is None or response.user is None:
+            return False
+        authid = await self.get_authid_by_userid(userid)
+        return authid is not None and str(authid) == str(response.user.id)
+    
+    async def get_user_emails_by_userids(self, userids: Iterable[str], raise_errors: bool = False) -> Dict[str, str]:
+        """Resolve many userids to emails, fetching all cache misses in one query"""
+        emails, missing = self._split_cached_userids(userids)
+        if missing:
+            for row in await self._resolve_user_emails(userids=missing, raise_errors=raise_errors):
+                if row.get("userid"):
+                    emails[row["userid"]] = row["email"]
+        return emails
+    
+    async def get_user_emails_by_authids(self, authids: Iterable[str]) -> Dict[str, str]:
+        """Resolve many authids to emails, fetching all cache misses in one query"""
+        emails, missing = self._split_cached_authids(authids)
+        if missing:
+            for row in await self._resolve_user_emails(authids=missing):
+                emails[row["authid"]] = row["email"]
+        return emails
+    
+    async def _resolve_user_emails(
+        self,
+        userids: Optional[list] = None,
+        authids: Optional[list] = None,
+        raise_errors: bool = False
+    ) -> list:
+        """Join users and auth.users in one round trip via the get_user_emails RPC"""
+        try:
+            response = await self.client.rpc("get_user_emails", {
+                "p_userids": userids,
+                "p_authids": authids
+            }).execute()
+            return self._cache_user_rows(response.data or [])
+        except Exception as e:
+            print(f"Error resolving user emails: {str(e)}")
+            if raise_errors:
+                raise
+            return []
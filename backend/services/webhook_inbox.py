@@ -0,0 +1,174 @@
+"""
+Durable inbox for accepted webhook events, backed by SQLite
+"""
+
+import asyncio
+import random
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import config
+
+
+# Called with due rows (id, kind, payload, attempts); returns how many it took
+Redeliver = Callable[[List[Tuple[int, str, bytes, int]]], Awaitable[int]]
+
+
+class WebhookInbox:
+    """Keeps webhook events from acknowledgement until they are processed"""
+
+    def __init__(self, path: Optional[str] = None):
+        # Same database file as the email outbox, in its own table
+        self.path = path or config.OUTBOX_PATH
+        self.max_attempts = config.WEBHOOK_INBOX_MAX_ATTEMPTS
+        self.lease_seconds = config.WEBHOOK_INBOX_LEASE_SECONDS
+        self.backoff_base = config.OUTBOX_BACKOFF_BASE
+        self.backoff_max = config.OUTBOX_BACKOFF_MAX
+        self.poll_interval = config.OUTBOX_POLL_INTERVAL
+
+        self._db = self._connect()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        # Counters for /health
+        self.redelivered_total = 0
+        self.retried_total = 0
+        self.dead_lettered_total = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the inbox database and make sure the table exists"""
+        db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_inbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webhook_inbox_ready "
+            "ON webhook_inbox (state, available_at)"
+        )
+        return db
+
+    def add_many(self, kind: str, payloads: List[bytes]) -> List[int]:
+        """Persist events in one transaction, leased to this process while it processes them"""
+        now = time.time()
+        ids = []
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for payload in payloads:
+                cursor = self._db.execute(
+                    "INSERT INTO webhook_inbox (kind, payload, available_at, created_at) VALUES (?, ?, ?, ?)",
+                    (kind, payload, now + self.lease_seconds, now)
+                )
+                ids.append(cursor.lastrowid)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return ids
+
+    def delete_many(self, ids: List[int]):
+        """Remove processed (or refused) events"""
+        self._db.executemany("DELETE FROM webhook_inbox WHERE id = ?", [(event_id,) for event_id in ids])
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt number"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def mark_failed(self, event_id: int, error: str):
+        """Schedule a retry, or dead-letter the event once attempts run out"""
+        row = self._db.execute("SELECT attempts FROM webhook_inbox WHERE id = ?", (event_id,)).fetchone()
+        if row is None:
+            return
+        attempts = row[0] + 1
+        if attempts >= self.max_attempts:
+            self._db.execute(
+                "UPDATE webhook_inbox SET state = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                (attempts, error, event_id)
+            )
+            self.dead_lettered_total += 1
+            print(f"Dead-lettered webhook event {event_id} after {attempts} attempts: {error}")
+        else:
+            self._db.execute(
+                "UPDATE webhook_inbox SET attempts = ?, available_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + self._backoff(attempts), error, event_id)
+            )
+            self.retried_total += 1
+
+    def claim_due(self, limit: int) -> List[Tuple[int, str, bytes, int]]:
+        """Lease up to `limit` events that are due: retries, and leases left by a dead process"""
+        if limit <= 0:
+            return []
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute(
+                "SELECT id, kind, payload, attempts FROM webhook_inbox "
+                "WHERE state = 'pending' AND available_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            if rows:
+                self._db.executemany(
+                    "UPDATE webhook_inbox SET available_at = ? WHERE id = ?",
+                    [(now + self.lease_seconds, row[0]) for row in rows]
+                )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return rows
+
+    def release(self, ids: List[int]):
+        """Make claimed events due again straight away (they could not be queued)"""
+        self._db.executemany(
+            "UPDATE webhook_inbox SET available_at = ? WHERE id = ?",
+            [(time.time(), event_id) for event_id in ids]
+        )
+
+    async def _sweep(self, redeliver: Redeliver, free_slots: Callable[[], int]):
+        """Hand due events back to the pipeline until stopped"""
+        while True:
+            try:
+                rows = self.claim_due(free_slots())
+                if rows:
+                    self.redelivered_total += await redeliver(rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Webhook inbox sweeper error: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self, redeliver: Redeliver, free_slots: Callable[[], int]):
+        """Start redelivering due events"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep(redeliver, free_slots))
+
+    async def stop(self):
+        """Stop redelivering; unprocessed events stay in the table for the next start"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Stored events for monitoring"""
+        counts = dict(self._db.execute(
+            "SELECT state, COUNT(*) FROM webhook_inbox GROUP BY state"
+        ).fetchall())
+        return {
+            "depth": counts.get("pending", 0),
+            "dead_letters": counts.get("dead", 0),
+            "redelivered_total": self.redelivered_total,
+            "retried_total": self.retried_total,
+            "dead_lettered_total": self.dead_lettered_total
+        }
@@ -0,0 +1,101 @@
+"""
+In-process ingestion pipeline for webhook events
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from config import config
+from services.keyed_executor import KeyedExecutor
+
+
+class WebhookPipeline:
+    """Bounded set of accepted webhook events, processed in order per key by async consumers"""
+
+    def __init__(
+        self,
+        process: Callable[[Any], Awaitable[None]],
+        key: Callable[[Any], Optional[Hashable]] = lambda item: None,
+        max_size: Optional[int] = None,
+        worker_count: Optional[int] = None
+    ):
+        self.process = process
+        self.key = key
+        self.max_size = max_size or config.WEBHOOK_QUEUE_SIZE
+        self.worker_count = worker_count or config.WEBHOOK_WORKERS
+        # Events sharing a key run one after another; other keys run in parallel
+        self.executor = KeyedExecutor(self._run, self.worker_count)
+        # Accepted events not yet processed, bounded by max_size
+        self._pending = 0
+        self._running = False
+
+        # Counters for /health
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether events are being accepted"""
+        return self._running
+
+    def free_slots(self) -> int:
+        """How many more events the pipeline can take"""
+        return self.max_size - self._pending
+
+    def submit(self, items: List[Any]) -> bool:
+        """Queue all of the items, or none of them if they don't fit"""
+        if not self._running or len(items) > self.free_slots():
+            self.rejected += len(items)
+            return False
+        for item in items:
+            self._pending += 1
+            self.executor.submit(self.key(item), item)
+        self.accepted += len(items)
+        return True
+
+    async def _run(self, item: Any):
+        """Process one item, keeping the counters"""
+        try:
+            await self.process(item)
+            self.processed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"Webhook pipeline error: {str(e)}")
+        finally:
+            self._pending -= 1
+
+    async def start(self):
+        """Start the consumers"""
+        if self._running:
+            return
+        self.executor.start()
+        self._running = True
+        print(f"Webhook pipeline started with {self.worker_count} workers (queue size {self.max_size})")
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop accepting events and let the queue drain within the timeout"""
+        if not self._running:
+            return
+        self._running = False
+        try:
+            await asyncio.wait_for(self.executor.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Webhook pipeline stopped with {self._pending} events unprocessed")
+        await self.executor.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and throughput counters for monitoring"""
+        executor_stats = self.executor.get_stats()
+        return {
+            "depth": self._pending,
+            "max_size": self.max_size,
+            "workers": self.worker_count if self._running else 0,
+            "max_shard_depth": executor_stats["max_shard_depth"],
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed
+        }
@@ -0,0 +1,32 @@
+"""
+uvicorn WebSocket protocol with tunable permessage-deflate
+
+uvicorn only exposes permessage-deflate as on/off (--ws-per-message-deflate).
+Run with this protocol to apply the WS_DEFLATE_* settings instead:
+
+    uvicorn main:app --ws services.websocket_protocol:TunedDeflateWebSocketsProtocol
+"""
+
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+from uvicorn.protocols.websockets.websockets_sansio_impl import WebSocketsSansIOProtocol
+from config import config
+
+
+def deflate_extension_factory() -> ServerPerMessageDeflateFactory:
+    """permessage-deflate negotiated with the configured window, level and memory settings"""
+    return ServerPerMessageDeflateFactory(
+        server_no_context_takeover=config.WS_DEFLATE_NO_CONTEXT_TAKEOVER,
+        server_max_window_bits=config.WS_DEFLATE_WINDOW_BITS,
+        client_max_window_bits=config.WS_DEFLATE_WINDOW_BITS,
+        compress_settings={"level": config.WS_DEFLATE_LEVEL, "memLevel": config.WS_DEFLATE_MEM_LEVEL}
+    )
+
+
+class TunedDeflateWebSocketsProtocol(WebSocketsSansIOProtocol):
+    """uvicorn's websockets-sansio protocol, negotiating deflate with WS_DEFLATE_* settings"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # --ws-per-message-deflate false still turns compression off entirely
+        if self.config.ws_per_message_deflate:
+            self.conn.available_extensions = [deflate_extension_factory()]
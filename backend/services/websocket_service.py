@@ -2,11 +2,207 @@
 WebSocket service for real-time updates
 """
 
-import json
 import asyncio
-from typing import Dict, Set, Any
+import uuid
+import zlib
+import msgspec
+from typing import Callable, Dict, List, Set, Any, Optional, Tuple, Union
 from fastapi import WebSocket, WebSocketDisconnect
-from collections import defaultdict
+from collections import defaultdict, deque
+from config import config
+from services import json_codec
+from services.pubsub import create_pubsub
+
+
+# What to do when a connection's outbound queue is full
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Payload encodings a client can ask for: JSON text frames, binary frames
+# holding raw DEFLATE of the JSON (inflate with DecompressionStream("deflate-raw")),
+# or binary msgpack frames
+ENCODINGS = ("text", "deflate", "msgpack")
+
+# Slots in the heartbeat timer wheel; one is visited every interval / slots seconds
+HEARTBEAT_WHEEL_SLOTS = 32
+
+# msgpack frames are encoded with msgspec, which the webhook models already need
+msgpack_encoder = msgspec.msgpack.Encoder()
+
+# Sec-WebSocket-Protocol values a client can offer, mapped to encodings
+SUBPROTOCOLS = {
+    "melotech.json": "text",
+    "melotech.msgpack": "msgpack"
+}
+
+
+def negotiate_subprotocol(offered: List[str]) -> Tuple[Optional[str], str]:
+    """Pick the first offered subprotocol we support, with its encoding"""
+    for subprotocol in offered:
+        encoding = SUBPROTOCOLS.get(subprotocol)
+        if encoding is not None:
+            return subprotocol, encoding
+    return None, "text"
+
+
+class PreparedMessage:
+    """An event serialised once, with its ASGI send message shared by every recipient"""
+    
+    __slots__ = ("text", "_messages")
+    
+    def __init__(self, text: str):
+        self.text = text
+        self._messages: Dict[str, Dict[str, Any]] = {}
+    
+    @classmethod
+    def from_event(cls, event: Dict[str, Any]) -> "PreparedMessage":
+        """Serialise an event to JSON once"""
+        return cls(json_codec.dumps(event))
+    
+    def asgi_message(self, encoding: str = "text") -> Dict[str, Any]:
+        """The websocket.send message for an encoding, built on first use"""
+        message = self._messages.get(encoding)
+        if message is None:
+            if encoding == "deflate":
+                compressor = zlib.compressobj(config.WS_PRECOMPRESS_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+                data = compressor.compress(self.text.encode("utf-8")) + compressor.flush()
+                message = {"type": "websocket.send", "bytes": data}
+            elif encoding == "msgpack":
+                try:
+                    value = json_codec.loads(self.text)
+                except json_codec.DECODE_ERRORS:
+                    # Plain text messages (e.g. echoes) go out as a msgpack string
+                    value = self.text
+                message = {"type": "websocket.send", "bytes": msgpack_encoder.encode(value)}
+            else:
+                message = {"type": "websocket.send", "text": self.text}
+            self._messages[encoding] = message
+        return message
+
+
+class ConnectionSender:
+    """Bounded outbound queue for one WebSocket connection, drained by a writer task while non-empty"""
+    
+    __slots__ = (
+        "manager", "websocket", "max_size", "policy", "encoding", "queue", "keyed",
+        "closed", "task", "sent", "dropped", "coalesced", "max_depth"
+    )
+    
+    def __init__(
+        self,
+        manager: "WebSocketManager",
+        websocket: WebSocket,
+        max_size: int,
+        policy: str,
+        encoding: str = "text"
+    ):
+        self.manager = manager
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = policy
+        self.encoding = encoding
+        # Entries are [key, PreparedMessage] so coalescing can replace a message in place.
+        # The queue, its key index and the writer task only exist while there is
+        # something to send, so an idle connection holds none of them
+        self.queue: Optional[deque] = None
+        self.keyed: Optional[Dict[str, list]] = None
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+        
+        # Counters for queue metrics
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+    
+    def enqueue(self, message: PreparedMessage, key: Optional[str] = None) -> bool:
+        """Queue a message without waiting; returns False if the connection is being dropped"""
+        if self.closed:
+            return False
+        if self.queue is None:
+            self.queue = deque()
+            self.keyed = {}
+        
+        if len(self.queue) >= self.max_size:
+            if self.policy == "disconnect":
+                self.manager.drop_slow_consumer(self.websocket)
+                return False
+            if self.policy == "coalesce" and key is not None and key in self.keyed:
+                # Only the latest state for this key matters
+                self.keyed[key][1] = message
+                self.coalesced += 1
+                return True
+            self._pop()
+            self.dropped += 1
+        
+        entry = [key, message]
+        self.queue.append(entry)
+        if key is not None:
+            self.keyed[key] = entry
+        if len(self.queue) > self.max_depth:
+            self.max_depth = len(self.queue)
+        if self.task is None:
+            self.task = asyncio.create_task(self._writer())
+        return True
+    
+    def _pop(self) -> PreparedMessage:
+        """Take the oldest queued message"""
+        key, message = entry = self.queue.popleft()
+        if key is not None and self.keyed.get(key) is entry:
+            del self.keyed[key]
+        return message
+    
+    async def _writer(self):
+        """Send queued messages in order until the queue is empty or the connection closes"""
+        try:
+            while self.queue and not self.closed:
+                # The encoded payload is shared; nothing is re-serialised per socket
+                await self.websocket.send(self._pop().asgi_message(self.encoding))
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error sending WebSocket message: {str(e)}")
+            self.manager.disconnect(self.websocket)
+        finally:
+            self.task = None
+            if not self.queue:
+                self.queue = None
+                self.keyed = None
+    
+    def close(self):
+        """Stop the writer and drop anything still queued"""
+        self.closed = True
+        self.queue = None
+        self.keyed = None
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Queue depth and delivery counters"""
+        return {
+            "depth": len(self.queue) if self.queue else 0,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced
+        }
+
+
+class Connection:
+    """Registry record for one WebSocket connection"""
+    
+    __slots__ = ("websocket", "room", "user_id", "connected_at", "last_seen", "sender", "slot")
+    
+    def __init__(self, websocket: WebSocket, room: str, user_id: Optional[str], now: float, sender: ConnectionSender, slot: int):
+        self.websocket = websocket
+        self.room = room
+        self.user_id = user_id
+        self.connected_at = now
+        # Last time the client was heard from; stale connections are reaped
+        self.last_seen = now
+        self.sender = sender
+        # Heartbeat wheel slot that visits this connection
+        self.slot = slot
 
 
 class WebSocketManager:
@@ -15,58 +211,363 @@ class WebSocketManager:
     def __init__(self):
         # Store active connections by room (e.g., "admin", "artist")
         self.active_connections: Dict[str, Set[WebSocket]] = defaultdict(set)
-        # Store connection metadata
-        self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
+        # Registry record (room, user, liveness, send queue) per connection
+        self.connections: Dict[WebSocket, Connection] = {}
+        # Index of connections by user_id, for per-artist delivery
+        self.user_connections: Dict[str, Set[WebSocket]] = {}
+        self.send_queue_size = config.WS_SEND_QUEUE_SIZE
+        self.slow_consumer_policy = config.WS_SLOW_CONSUMER_POLICY
+        if self.slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"WS_SLOW_CONSUMER_POLICY must be one of: {', '.join(SLOW_CONSUMER_POLICIES)}")
+        self.slow_consumers_disconnected = 0
+        # Events are published once and every worker fans them out locally
+        self.pubsub = create_pubsub()
+        # Applies cache invalidations published on the same channel: handler(kind, payload)
+        self.invalidation_handler: Optional[Callable[[str, Any], None]] = None
+        # Submission updates waiting for the coalescing window, by (target, name),
+        # keeping only the latest state per submission_id
+        self.coalesce_window = config.WS_COALESCE_WINDOW
+        self._pending_updates: Dict[Tuple[str, str], Dict[Any, Dict[str, Any]]] = {}
+        self.updates_queued = 0
+        self.update_frames_sent = 0
+        # Every delivered event gets the next sequence number and is kept in a
+        # bounded ring buffer so reconnecting clients can replay what they missed.
+        # Numbers are per worker; stream_id changes whenever the count restarts
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.sequence = 0
+        self.replay_buffer: deque = deque(maxlen=config.WS_REPLAY_BUFFER_SIZE)
+        self.replays_served = 0
+        self.resyncs_required = 0
+        # Heartbeats: one timer wheel visits a slot per tick, so every connection
+        # is checked once per interval without a task or timer per socket
+        self.heartbeat_interval = config.WS_HEARTBEAT_INTERVAL
+        self.heartbeat_timeout = config.WS_HEARTBEAT_TIMEOUT
+        self._wheel: List[Set[Connection]] = [set() for _ in range(HEARTBEAT_WHEEL_SLOTS)]
+        self._wheel_position = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.pings_sent = 0
+        self.connections_reaped = 0
+        # Fire-and-forget tasks (closes, flushes); the loop only keeps weak references
+        self._tasks: set = set()
+    
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+    
+    async def start(self):
+        """Start receiving events from the pub/sub backend and sending heartbeats"""
+        await self.pubsub.start(self._on_event)
+        if self.heartbeat_interval > 0 and self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+    
+    async def stop(self):
+        """Stop heartbeats and receiving events from the pub/sub backend"""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        await self.pubsub.stop()
+    
+    async def _heartbeat(self):
+        """Turn the timer wheel one slot per tick"""
+        tick = self.heartbeat_interval / len(self._wheel)
+        while True:
+            await asyncio.sleep(tick)
+            try:
+                self._heartbeat_tick(asyncio.get_event_loop().time())
+            except Exception as e:
+                print(f"Error in WebSocket heartbeat: {str(e)}")
+    
+    def _heartbeat_tick(self, now: float):
+        """Ping the quiet connections in the current slot and reap the dead ones"""
+        slot = self._wheel[self._wheel_position]
+        self._wheel_position = (self._wheel_position + 1) % len(self._wheel)
+        ping = None
+        for connection in list(slot):
+            idle = now - connection.last_seen
+            if idle >= self.heartbeat_timeout:
+                # No pong or message for too long: the peer is gone or half-open
+                print(f"Reaping WebSocket in room '{connection.room}' idle for {idle:.0f}s")
+                self.connections_reaped += 1
+                self.disconnect(connection.websocket)
+                self._spawn(self._close_quietly(connection.websocket, 1001))
+            elif idle >= self.heartbeat_interval / 2:
+                if ping is None:
+                    ping = PreparedMessage.from_event({"type": "ping", "timestamp": now})
+                connection.sender.enqueue(ping)
+                self.pings_sent += 1
+    
+    def record_activity(self, websocket: WebSocket, data: str) -> bool:
+        """Mark a connection as alive; returns True if the message was a heartbeat pong"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.last_seen = asyncio.get_event_loop().time()
+        if not data.startswith("{"):
+            return False
+        try:
+            return json_codec.loads(data).get("type") == "pong"
+        except json_codec.DECODE_ERRORS:
+            return False
+    
+    async def publish(self, target: str, name: str, message: Union[str, PreparedMessage], key: Optional[str] = None):
+        """Publish an event for a room or a user to every worker"""
+        text = message.text if isinstance(message, PreparedMessage) else message
+        # target, name and key never contain newlines; the JSON text may follow as-is
+        await self.pubsub.publish(f"{target}\n{name}\n{key or ''}\n{text}")
     
-    async def connect(self, websocket: WebSocket, room: str, user_id: str = None):
-        """Accept a WebSocket connection and add to room"""
-        await websocket.accept()
+    def publish_invalidation(self, kind: str, payload: Any):
+        """Publish a cache invalidation to every worker, without waiting for it"""
+        self._spawn(self.publish("cache", kind, json_codec.dumps(payload)))
+    
+    async def _on_event(self, envelope: str):
+        """Deliver an event from the pub/sub backend to this worker's connections"""
+        target, name, key, text = envelope.split("\n", 3)
+        if target == "cache":
+            # Not a client event: no sequence number, nothing to replay
+            if self.invalidation_handler is not None:
+                self.invalidation_handler(name, json_codec.loads(text))
+            return
+        message = self._sequence_event(target, name, key or None, text)
+        if target == "room":
+            self._deliver_to_room(message, name, key or None)
+        elif target == "user":
+            self._deliver_to_user(message, name, key or None)
+    
+    def _sequence_event(self, target: str, name: str, key: Optional[str], text: str) -> PreparedMessage:
+        """Stamp an event with the next sequence number and keep it for replay"""
+        self.sequence += 1
+        if text.startswith("{"):
+            # Splice the fields in rather than parsing and re-serialising the event
+            text = f'{{"seq":{self.sequence},"stream":"{self.stream_id}",{text[1:]}'
+        message = PreparedMessage(text)
+        self.replay_buffer.append((self.sequence, target, name, key, message))
+        return message
+    
+    def _missed_events(self, room: str, user_id: Optional[str], since: int) -> Optional[List[Tuple[Optional[str], PreparedMessage]]]:
+        """Events after `since` addressed to a connection, or None if they are no longer all buffered"""
+        oldest = self.replay_buffer[0][0] if self.replay_buffer else self.sequence + 1
+        if since > self.sequence or since < oldest - 1:
+            return None
+        missed = []
+        for seq, target, name, key, message in self.replay_buffer:
+            if seq <= since:
+                continue
+            if (target == "room" and name == room) or (target == "user" and user_id and name == user_id):
+                missed.append((key, message))
+        if len(missed) > self.send_queue_size:
+            # Replaying would overflow the send queue; a full reload is cheaper
+            return None
+        return missed
+    
+    def _replay(self, websocket: WebSocket, room: str, user_id: Optional[str], since: Optional[int], stream: Optional[str]):
+        """Queue the events a reconnecting client missed, or tell it to resync"""
+        missed = None
+        if stream is None or stream == self.stream_id:
+            missed = self._missed_events(room, user_id, since)
+        if missed is None:
+            self.resyncs_required += 1
+            self.enqueue(websocket, json_codec.dumps({
+                "type": "resync_required",
+                "seq": self.sequence,
+                "stream": self.stream_id,
+                "timestamp": asyncio.get_event_loop().time()
+            }))
+            return
+        self.replays_served += 1
+        for key, message in missed:
+            self.enqueue(websocket, message, key)
+    
+    async def connect(
+        self,
+        websocket: WebSocket,
+        room: str,
+        user_id: str = None,
+        encoding: Optional[str] = None,
+        since: Optional[int] = None,
+        stream: Optional[str] = None
+    ):
+        """Accept a WebSocket connection and add to room, replaying events after `since`"""
+        # The encoding comes from the negotiated subprotocol unless one was asked for explicitly
+        subprotocol, negotiated = negotiate_subprotocol(websocket.scope.get("subprotocols") or [])
+        await websocket.accept(subprotocol=subprotocol)
+        encoding = encoding or negotiated
+        if encoding not in ENCODINGS:
+            encoding = "text"
+        sender = ConnectionSender(self, websocket, self.send_queue_size, self.slow_consumer_policy, encoding)
+        # The slot just behind the wheel's position comes round again in one interval
+        slot = (self._wheel_position - 1) % len(self._wheel)
+        connection = Connection(websocket, room, user_id, asyncio.get_event_loop().time(), sender, slot)
+        self.connections[websocket] = connection
+        self._wheel[slot].add(connection)
         self.active_connections[room].add(websocket)
-        self.connection_metadata[websocket] = {
-            "room": room,
-            "user_id": user_id,
-            "connected_at": asyncio.get_event_loop().time()
-        }
+        if user_id:
+            self.user_connections.setdefault(user_id, set()).add(websocket)
+        if since is not None:
+            # Registered and replayed without yielding, so no live event can slip in between
+            self._replay(websocket, room, user_id, since, stream)
         print(f"WebSocket connected to room '{room}'")
     
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
-        if websocket in self.connection_metadata:
-            room = self.connection_metadata[websocket]["room"]
-            self.active_connections[room].discard(websocket)
-            del self.connection_metadata[websocket]
-            print(f"WebSocket disconnected from room '{room}'")
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        connection.sender.close()
+        self._wheel[connection.slot].discard(connection)
+        self.active_connections[connection.room].discard(websocket)
+        user_id = connection.user_id
+        if user_id in self.user_connections:
+            self.user_connections[user_id].discard(websocket)
+            if not self.user_connections[user_id]:
+                del self.user_connections[user_id]
+        print(f"WebSocket disconnected from room '{connection.room}'")
+    
+    def drop_slow_consumer(self, websocket: WebSocket):
+        """Disconnect a client whose send queue is full"""
+        print("Disconnecting slow WebSocket consumer (send queue full)")
+        self.slow_consumers_disconnected += 1
+        self.disconnect(websocket)
+        # 1013: try again later; the client reconnects and resyncs
+        self._spawn(self._close_quietly(websocket, 1013))
+    
+    async def _close_quietly(self, websocket: WebSocket, code: int):
+        """Close a socket, ignoring errors from peers that are already gone"""
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+    
+    def enqueue(
+        self,
+        websocket: WebSocket,
+        message: Union[str, PreparedMessage],
+        key: Optional[str] = None
+    ) -> bool:
+        """Queue a message for one connection without waiting for the send"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return False
+        if isinstance(message, str):
+            message = PreparedMessage(message)
+        return connection.sender.enqueue(message, key)
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """Send a message to a specific WebSocket connection"""
+        self.enqueue(websocket, message)
+    
+    async def broadcast_to_room(
+        self,
+        message: Union[str, PreparedMessage],
+        room: str,
+        key: Optional[str] = None
+    ):
+        """Broadcast a message to all connections in a room, on every worker"""
+        await self.publish("room", room, message, key)
+    
+    async def send_to_user(
+        self,
+        user_id: str,
+        message: Union[str, PreparedMessage],
+        key: Optional[str] = None
+    ):
+        """Send a message to every connection of one user, on every worker"""
+        await self.publish("user", user_id, message, key)
+    
+    def _deliver_to_room(self, message: PreparedMessage, room: str, key: Optional[str] = None):
+        """Queue a message for this worker's connections in a room"""
+        # Each connection has its own writer, so a slow socket only delays itself
+        for websocket in list(self.active_connections.get(room, ())):
+            self.enqueue(websocket, message, key)
+    
+    def _deliver_to_user(self, message: PreparedMessage, user_id: str, key: Optional[str] = None):
+        """Queue a message for this worker's connections of one user"""
+        for websocket in list(self.user_connections.get(user_id, ())):
+            self.enqueue(websocket, message, key)
+    
+    async def send_submission_update_to_user(self, user_id: str, submission_data: Dict[str, Any]):
+        """Send a submission update to the artist who owns the submission"""
+        message = PreparedMessage.from_event({
+            "type": "submission_update",
+            "data": submission_data,
+            "timestamp": asyncio.get_event_loop().time()
+        })
+        await self.send_to_user(user_id, message, key=f"submission:{submission_data.get('submission_id')}")
+    
+    def queue_submission_update(self, submission_data: Dict[str, Any], room: str = "admin"):
+        """Broadcast a submission update to a room after the coalescing window"""
+        self._coalesce("room", room, submission_data)
+    
+    def queue_submission_update_for_user(self, user_id: str, submission_data: Dict[str, Any]):
+        """Send a submission update to its artist after the coalescing window"""
+        self._coalesce("user", user_id, submission_data)
+    
+    def _coalesce(self, target: str, name: str, submission_data: Dict[str, Any]):
+        """Merge an update into the pending window, flushing it when the window ends"""
+        self.updates_queued += 1
+        if self.coalesce_window <= 0:
+            self._spawn(self._flush_updates(target, name, [submission_data]))
+            return
+        
+        pending = self._pending_updates.get((target, name))
+        if pending is None:
+            pending = self._pending_updates[(target, name)] = {}
+            asyncio.get_running_loop().call_later(self.coalesce_window, self._end_window, target, name)
+        
+        submission_id = submission_data.get("submission_id")
+        previous = pending.get(submission_id)
+        if previous is not None:
+            # Latest state wins, but keep every field that changed in the window
+            updated_fields = list(dict.fromkeys(
+                previous.get("updated_fields", []) + submission_data.get("updated_fields", [])
+            ))
+            submission_data = {**submission_data, "updated_fields": updated_fields}
+        pending[submission_id] = submission_data
+    
+    def _end_window(self, target: str, name: str):
+        """Take the updates collected in a window and send them"""
+        pending = self._pending_updates.pop((target, name), None)
+        if pending:
+            self._spawn(self._flush_updates(target, name, list(pending.values())))
+    
+    async def _flush_updates(self, target: str, name: str, updates: List[Dict[str, Any]]):
+        """Send a window's updates as one frame (a single update keeps the old frame type)"""
         try:
-            await websocket.send_text(message)
+            self.update_frames_sent += 1
+            if len(updates) == 1:
+                if target == "room":
+                    await self.broadcast_submission_update(updates[0], name)
+                else:
+                    await self.send_submission_update_to_user(name, updates[0])
+            elif target == "room":
+                await self.broadcast_submission_updates(updates, name)
+            else:
+                await self.send_to_user(name, PreparedMessage.from_event({
+                    "type": "submission_updates",
+                    "data": updates,
+                    "timestamp": asyncio.get_event_loop().time()
+                }))
         except Exception as e:
-            print(f"Error sending personal message: {str(e)}")
-            self.disconnect(websocket)
-    
-    async def broadcast_to_room(self, message: str, room: str):
-        """Broadcast a message to all connections in a room"""
-        if room in self.active_connections:
-            disconnected = set()
-            for websocket in self.active_connections[room]:
-                try:
-                    await websocket.send_text(message)
-                except Exception as e:
-                    print(f"Error broadcasting to room '{room}': {str(e)}")
-                    disconnected.add(websocket)
-            
-            # Remove disconnected connections
-            for websocket in disconnected:
-                self.disconnect(websocket)
+            print(f"Error broadcasting coalesced submission updates: {str(e)}")
     
     async def broadcast_submission_update(self, submission_data: Dict[str, Any], room: str = "admin"):
         """Broadcast submission update to admin room"""
-        message = json.dumps({
+        message = PreparedMessage.from_event({
             "type": "submission_update",
             "data": submission_data,
             "timestamp": asyncio.get_event_loop().time()
         })
+        await self.broadcast_to_room(message, room, key=f"submission:{submission_data.get('submission_id')}")
+    
+    async def broadcast_submission_updates(self, updates: List[Dict[str, Any]], room: str = "admin"):
+        """Broadcast several submission updates to a room as one frame"""
+        message = PreparedMessage.from_event({
+            "type": "submission_updates",
+            "data": updates,
+            "timestamp": asyncio.get_event_loop().time()
+        })
         await self.broadcast_to_room(message, room)
     
     def get_connection_count(self, room: str = None) -> int:
@@ -78,6 +579,72 @@ class WebSocketManager:
     def get_rooms(self) -> list:
         """Get list of active rooms"""
         return list(self.active_connections.keys())
+    
+    def get_user_count(self) -> int:
+        """Get the number of distinct users with at least one connection"""
+        return len(self.user_connections)
+    
+    def get_pubsub_stats(self) -> Dict[str, Any]:
+        """Which pub/sub backend is in use and how many events went through it"""
+        return {
+            "backend": self.pubsub.name,
+            "published": self.pubsub.published,
+            "received": getattr(self.pubsub, "received", self.pubsub.published)
+        }
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """How many submission updates were merged into how many frames"""
+        return {
+            "window_seconds": self.coalesce_window,
+            "updates_queued": self.updates_queued,
+            "frames_sent": self.update_frames_sent,
+            "pending_windows": len(self._pending_updates)
+        }
+    
+    def get_replay_stats(self) -> Dict[str, Any]:
+        """Sequence position and how reconnects were served"""
+        return {
+            "stream": self.stream_id,
+            "seq": self.sequence,
+            "buffered": len(self.replay_buffer),
+            "buffer_size": self.replay_buffer.maxlen,
+            "replays_served": self.replays_served,
+            "resyncs_required": self.resyncs_required
+        }
+    
+    def get_heartbeat_stats(self) -> Dict[str, Any]:
+        """Heartbeat settings and how many pings and reaps there have been"""
+        return {
+            "interval_seconds": self.heartbeat_interval,
+            "timeout_seconds": self.heartbeat_timeout,
+            "pings_sent": self.pings_sent,
+            "connections_reaped": self.connections_reaped
+        }
+    
+    def get_queue_stats(self, include_connections: bool = False) -> Dict[str, Any]:
+        """Send queue metrics, optionally broken down per connection"""
+        stats = {
+            "policy": self.slow_consumer_policy,
+            "queue_size": self.send_queue_size,
+            "total_depth": 0,
+            "max_depth": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "slow_consumers_disconnected": self.slow_consumers_disconnected
+        }
+        connections = []
+        for connection in self.connections.values():
+            sender_stats = connection.sender.get_stats()
+            stats["total_depth"] += sender_stats["depth"]
+            stats["max_depth"] = max(stats["max_depth"], sender_stats["depth"])
+            stats["dropped"] += sender_stats["dropped"]
+            stats["coalesced"] += sender_stats["coalesced"]
+            if include_connections:
+                # No user ids: this endpoint is unauthenticated
+                connections.append({"room": connection.room, **sender_stats})
+        if include_connections:
+            stats["connections"] = connections
+        return stats
 
 
 # Global WebSocket manager instance
@@ -0,0 +1,42 @@
+-- Apply a batch of submission reviews in one round trip.
+--
+-- Used by POST /submissions/bulk-review. p_updates is a JSON array of
+-- {id, status, rating, feedback}; null or missing fields leave the column
+-- unchanged. Each updated row comes back projected like
+-- update_submission_with_email, with user_email joined from public.users
+-- and auth.users. Ids that match no submission are simply absent.
+--
+-- Run once in the Supabase SQL editor.
+
+create or replace function public.bulk_update_submissions_with_email(
+    p_updates jsonb
+)
+returns setof jsonb
+language sql
+volatile
+security definer
+set search_path = ''
+as $$
+    with changes as (
+        select *
+        from jsonb_to_recordset(p_updates) as c(id uuid, status text, rating integer, feedback text)
+    ),
+    updated as (
+        update public.submissions s
+        set status = coalesce(c.status, s.status),
+            rating = coalesce(c.rating, s.rating),
+            feedback = coalesce(c.feedback, s.feedback),
+            updated_at = now()
+        from changes c
+        where s.id = c.id
+        returning s.id, s.userid, s.title, s.status, s.rating, s.feedback, s.updated_at
+    )
+    select to_jsonb(up) || jsonb_build_object('user_email', a.email::text)
+    from updated up
+    left join public.users u on u.id = up.userid
+    left join auth.users a on a.id = u.authid;
+$$;
+
+-- Only the backend's service role may call this
+revoke all on function public.bulk_update_submissions_with_email(jsonb) from public, anon, authenticated;
+grant execute on function public.bulk_update_submissions_with_email(jsonb) to service_role;
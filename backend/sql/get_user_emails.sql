@@ -0,0 +1,32 @@
+-- Resolve user emails in one round trip for SupabaseService.
+--
+-- PostgREST cannot reach auth.users directly, so this joins
+-- public.users (id, authid) with auth.users (id, email) server-side.
+-- Pass userids (public.users.id), authids (auth.users.id), or both.
+--
+-- Run once in the Supabase SQL editor.
+
+create or replace function public.get_user_emails(
+    p_userids uuid[] default null,
+    p_authids uuid[] default null
+)
+returns table (userid uuid, authid uuid, email text)
+language sql
+stable
+security definer
+set search_path = ''
+as $$
+    select u.id, u.authid, a.email::text
+    from public.users u
+    join auth.users a on a.id = u.authid
+    where u.id = any(p_userids)
+    union
+    select u.id, a.id, a.email::text
+    from auth.users a
+    left join public.users u on u.authid = a.id
+    where a.id = any(p_authids);
+$$;
+
+-- Emails are private: only the backend's service role may call this
+revoke all on function public.get_user_emails(uuid[], uuid[]) from public, anon, authenticated;
+grant execute on function public.get_user_emails(uuid[], uuid[]) to service_role;
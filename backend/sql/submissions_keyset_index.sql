@@ -0,0 +1,10 @@
+-- Index backing GET /users/{userid}/submissions.
+--
+-- The listing pages through a user's submissions ordered by
+-- (updated_at desc, id desc). With this index each page is a short range
+-- scan, so the cost of a page doesn't grow with the number of submissions.
+--
+-- Run once in the Supabase SQL editor.
+
+create index if not exists submissions_userid_updated_at_id_idx
+    on public.submissions (userid, updated_at desc, id desc);
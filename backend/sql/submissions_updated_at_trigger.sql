@@ -0,0 +1,23 @@
+-- Keep submissions.updated_at current on every update.
+--
+-- The backend deduplicates webhook events and orders cached rows by
+-- updated_at. The API's functions set it, but edits from the dashboard or
+-- other clients may not; this trigger stamps every updated row.
+--
+-- Run once in the Supabase SQL editor.
+
+create or replace function public.set_submissions_updated_at()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+drop trigger if exists submissions_set_updated_at on public.submissions;
+create trigger submissions_set_updated_at
+    before update on public.submissions
+    for each row execute function public.set_submissions_updated_at();
@@ -0,0 +1,39 @@
+-- Update a submission and return it with its owner's email in one round trip.
+--
+-- Used by PUT /submissions/{id}. Only the columns the API and the status
+-- email need are returned, plus user_email joined from public.users and
+-- auth.users. Null arguments leave the column unchanged. Returns null when
+-- no submission matches.
+--
+-- Run once in the Supabase SQL editor.
+
+create or replace function public.update_submission_with_email(
+    p_submission_id uuid,
+    p_status text default null,
+    p_rating integer default null,
+    p_feedback text default null
+)
+returns jsonb
+language sql
+volatile
+security definer
+set search_path = ''
+as $$
+    with updated as (
+        update public.submissions s
+        set status = coalesce(p_status, s.status),
+            rating = coalesce(p_rating, s.rating),
+            feedback = coalesce(p_feedback, s.feedback),
+            updated_at = now()
+        where s.id = p_submission_id
+        returning s.id, s.userid, s.title, s.status, s.rating, s.feedback, s.updated_at
+    )
+    select to_jsonb(up) || jsonb_build_object('user_email', a.email::text)
+    from updated up
+    left join public.users u on u.id = up.userid
+    left join auth.users a on a.id = u.authid;
+$$;
+
+-- Only the backend's service role may call this
+revoke all on function public.update_submission_with_email(uuid, text, integer, text) from public, anon, authenticated;
+grant execute on function public.update_submission_with_email(uuid, text, integer, text) to service_role;
@@ -65,7 +65,8 @@ def test_webhook():
         print(f"\nResponse Status: {response.status_code}")
         print(f"Response Body: {response.text}")
         
-        if response.status_code == 200:
+        # 202: the events are accepted and processed in the background
+        if response.status_code in (200, 202):
             print("\n✅ Webhook test successful!")
         else:
             print(f"\n❌ Webhook test failed with status {response.status_code}")
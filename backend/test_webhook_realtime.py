@@ -66,7 +66,8 @@ def test_webhook_endpoint():
             headers={"Content-Type": "application/json"}
         )
         
-        if response.status_code == 200:
+        # 202: the events are accepted and processed in the background
+        if response.status_code in (200, 202):
             print("✅ Webhook endpoint responded successfully")
             print(f"📄 Response: {response.json()}")
         else:
@@ -1,4 +1,4 @@
-import { useCallback } from "react";
+import { useCallback, useRef } from "react";
 import { useWebSocket } from "./useWebSocket";
 
 interface SubmissionUpdate {
@@ -15,20 +15,65 @@ interface SubmissionUpdate {
 
 interface UseAdminWebSocketOptions {
   onSubmissionUpdate?: (update: SubmissionUpdate) => void;
+  // Receives every update of a coalesced frame at once, so they can be
+  // applied in a single render; falls back to onSubmissionUpdate per item
+  onSubmissionUpdates?: (updates: SubmissionUpdate[]) => void;
   onConnectionChange?: (isConnected: boolean) => void;
+  // Called when the server could not replay the updates missed while
+  // disconnected; the caller should reload its data in full
+  onResyncRequired?: () => void;
 }
 
+const BACKEND_WS_URL = `${
+  import.meta.env.VITE_BACKEND_URL?.replace("http", "ws") ||
+  "ws://localhost:8000"
+}/ws/admin`;
+
 export function useAdminWebSocket({
   onSubmissionUpdate,
+  onSubmissionUpdates,
   onConnectionChange,
+  onResyncRequired,
 }: UseAdminWebSocketOptions = {}) {
+  // Position in the server's event stream, sent back on reconnect so only
+  // the missed updates are replayed
+  const lastSeqRef = useRef<number | null>(null);
+  const streamRef = useRef<string | null>(null);
+
+  const buildUrl = useCallback(() => {
+    if (lastSeqRef.current === null || !streamRef.current) {
+      return BACKEND_WS_URL;
+    }
+    return `${BACKEND_WS_URL}?since=${lastSeqRef.current}&stream=${streamRef.current}`;
+  }, []);
+
   const handleMessage = useCallback(
     (message: any) => {
-      if (message.type === "submission_update") {
-        onSubmissionUpdate?.(message.data);
+      if (typeof message.seq === "number") {
+        lastSeqRef.current = message.seq;
+        streamRef.current = message.stream;
+      }
+
+      if (message.type === "resync_required") {
+        onResyncRequired?.();
+      } else if (message.type === "submission_update") {
+        if (onSubmissionUpdates) {
+          onSubmissionUpdates([message.data]);
+        } else {
+          onSubmissionUpdate?.(message.data);
+        }
+      } else if (message.type === "submission_updates") {
+        // Bulk reviews and coalesced bursts arrive as one frame
+        if (onSubmissionUpdates) {
+          onSubmissionUpdates(message.data);
+        } else {
+          message.data.forEach((update: SubmissionUpdate) =>
+            onSubmissionUpdate?.(update)
+          );
+        }
       }
     },
-    [onSubmissionUpdate]
+    [onSubmissionUpdate, onSubmissionUpdates, onResyncRequired]
   );
 
   const handleOpen = useCallback(() => {
@@ -40,14 +85,11 @@ export function useAdminWebSocket({
   }, [onConnectionChange]);
 
   const { isConnected, connectionStatus, sendMessage } = useWebSocket({
-    url: `${
-      import.meta.env.VITE_BACKEND_URL?.replace("http", "ws") ||
-      "ws://localhost:8000"
-    }/ws/admin`,
+    url: buildUrl,
     onMessage: handleMessage,
     onOpen: handleOpen,
     onClose: handleClose,
-    maxReconnectAttempts: 1, // Only try once
+    maxReconnectAttempts: 5, // Resumes from the last seen event each time
   });
 
   return {
@@ -4,15 +4,20 @@ interface WebSocketMessage {
   type: string;
   data: any;
   timestamp: number;
+  // Set on broadcast events so clients can resume with ?since=
+  seq?: number;
+  stream?: string;
 }
 
 interface UseWebSocketOptions {
-  url: string;
+  // A function is called again on every (re)connect, e.g. to add a resume offset
+  url: string | (() => string);
   onMessage?: (message: WebSocketMessage) => void;
   onOpen?: () => void;
   onClose?: () => void;
   onError?: (error: Event) => void;
   maxReconnectAttempts?: number;
+  reconnectDelayMs?: number;
 }
 
 export function useWebSocket({
@@ -22,6 +27,7 @@ export function useWebSocket({
   onClose,
   onError,
   maxReconnectAttempts = 1, // Only try once by default
+  reconnectDelayMs = 1000,
 }: UseWebSocketOptions) {
   const [isConnected, setIsConnected] = useState(false);
   const [connectionStatus, setConnectionStatus] = useState<
@@ -30,9 +36,12 @@ export function useWebSocket({
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectAttemptsRef = useRef(0);
   const hasAttemptedConnectionRef = useRef(false);
+  const reconnectTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  // Bumped to open a new connection after the previous one closed
+  const [connectionKey, setConnectionKey] = useState(0);
 
   useEffect(() => {
-    // Only attempt connection once
+    // Only attempt connection once per URL / reconnect
     if (hasAttemptedConnectionRef.current) {
       return;
     }
@@ -41,7 +50,7 @@ export function useWebSocket({
     setConnectionStatus("connecting");
 
     try {
-      const ws = new WebSocket(url);
+      const ws = new WebSocket(typeof url === "function" ? url() : url);
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -54,6 +63,11 @@ export function useWebSocket({
       ws.onmessage = (event) => {
         try {
           const message: WebSocketMessage = JSON.parse(event.data);
+          // Answer server heartbeats so the connection isn't reaped as dead
+          if (message.type === "ping") {
+            ws.send(JSON.stringify({ type: "pong" }));
+            return;
+          }
           onMessage?.(message);
         } catch (error) {
           // Silent error handling
@@ -64,6 +78,16 @@ export function useWebSocket({
         setIsConnected(false);
         setConnectionStatus("disconnected");
         onClose?.();
+
+        // Reconnect with backoff, up to maxReconnectAttempts times in a row
+        if (reconnectAttemptsRef.current < maxReconnectAttempts) {
+          const delay = reconnectDelayMs * 2 ** reconnectAttemptsRef.current;
+          reconnectAttemptsRef.current += 1;
+          reconnectTimerRef.current = setTimeout(() => {
+            hasAttemptedConnectionRef.current = false;
+            setConnectionKey((key) => key + 1);
+          }, delay);
+        }
       };
 
       ws.onerror = (error) => {
@@ -79,12 +103,18 @@ export function useWebSocket({
 
     // Cleanup function
     return () => {
+      if (reconnectTimerRef.current) {
+        clearTimeout(reconnectTimerRef.current);
+        reconnectTimerRef.current = null;
+      }
       if (wsRef.current) {
+        // Closed on purpose: don't report it or schedule a reconnect
+        wsRef.current.onclose = null;
         wsRef.current.close();
         wsRef.current = null;
       }
     };
-  }, [url]); // Only depend on URL
+  }, [connectionKey]); // Only reconnect when a new connection is due
 
   const sendMessage = (message: any) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
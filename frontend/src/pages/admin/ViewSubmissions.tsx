@@ -90,11 +90,13 @@ export default function AdminPage() {
 
   // WebSocket for real-time updates
   const { isConnected: isWebSocketConnected } = useAdminWebSocket({
-    onSubmissionUpdate: (update: any) => {
-      // Update the specific submission in the list
+    onSubmissionUpdates: (updates: any[]) => {
+      // Apply every update in the frame with a single state change
+      const byId = new Map(updates.map((update) => [update.submission_id, update]));
       setSubmissions((prev: Submission[]) =>
-        prev.map((submission: Submission) =>
-          submission.id === update.submission_id
+        prev.map((submission: Submission) => {
+          const update = byId.get(submission.id);
+          return update
             ? {
                 ...submission,
                 status: update.new_data.status as
@@ -105,16 +107,23 @@ export default function AdminPage() {
                 rating: update.new_data.rating,
                 feedback: update.new_data.feedback,
               }
-            : submission
-        )
+            : submission;
+        })
       );
 
       // Show toast notification
       toast({
-        title: "Submission Updated",
-        description: `${update.title} has been updated`,
+        title: updates.length === 1 ? "Submission Updated" : "Submissions Updated",
+        description:
+          updates.length === 1
+            ? `${updates[0].title} has been updated`
+            : `${updates.length} submissions have been updated`,
       });
     },
+    onResyncRequired: () => {
+      // Too much was missed while disconnected to replay; reload everything
+      fetchSubmissions();
+    },
     onConnectionChange: (connected: boolean) => {
       if (connected) {
         toast({